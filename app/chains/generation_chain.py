@@ -1,13 +1,23 @@
-from app.utils.llm import GroqModel
-from app.prompts.base import PromptHandler
+from app.utils.llm import get_llm
+from app.prompts.registry import PromptRegistry
 from app.utils.descriptor import Descriptor
 
 
 class GenerationChain:
+    # Templates used by the methods below, checked when the chain is created
+    PROMPTS = [
+        ("summarization", "generation"),
+        ("summarization", "regeneration"),
+        ("summarization", "descriptor"),
+        ("question_answering", "qa"),
+        ("qa_video", "qa"),
+    ]
+
     def __init__(self):
-        self.model = GroqModel()
+        PromptRegistry.load(self.PROMPTS)
+        self.model = get_llm()
 
-    def run(self, context_history: list[dict[str, str]] = None, prompt_type: str = "generation",feature: str="summarization", **kwargs) -> str:
+    def run(self, context_history: list[dict[str, str]] = None, prompt_type: str = "generation",feature: str="summarization", on_token=None, **kwargs) -> str:
         """
         Run the generation chain with the current notes and optional chat history.
 
@@ -15,6 +25,8 @@ class GenerationChain:
             notes (str): User-provided notes.
             context_history (list): Optional past messages for context.
             prompt_type (str): Type of prompt ('generation', 'condensed', etc.)
+            on_token (callable): Optional callback; when given, the response is streamed
+                and each token is passed to it as it arrives.
             **kwargs: Additional keyword arguments for prompt building (e.g. retrieved_context)
 
         Returns:
@@ -25,16 +37,24 @@ class GenerationChain:
 
 
         prompt_args = {**kwargs}
-        prompt = PromptHandler(
+        prompt = PromptRegistry.build(
             feature=feature,
             prompt_type=prompt_type,
             **prompt_args
-        )._load_prompt()
+        )
 
         history = context_history.copy()
         history.append({"role": "user", "content": prompt})
 
-        response = self.model.chat_completion(history)
+        if on_token is None:
+            response = self.model.chat_completion(history, feature=feature, prompt_type=prompt_type)
+        else:
+            # Delimiters are parsed by callers on the full response, never per token
+            parts = []
+            for token in self.model.chat_completion_stream(history, feature=feature, prompt_type=prompt_type):
+                parts.append(token)
+                on_token(token)
+            response = "".join(parts)
 
         history.append({"role": "assistant", "content": response})
 
@@ -105,17 +125,19 @@ class GenerationChain:
             prompt_type="descriptor"
         )
 
-    def question_answering(self, context: str, question: str):
+    def question_answering(self, context: str, question: str, on_token=None):
 
         return self.run(context=context, 
                         question=question,
                         feature="question_answering",
-                        prompt_type="qa"
+                        prompt_type="qa",
+                        on_token=on_token
                     )
-    def question_answering_video(self, context: str, question: str):
+    def question_answering_video(self, context: str, question: str, on_token=None):
 
         return self.run(context=context, 
                         question=question,
                         feature="qa_video",
-                        prompt_type="qa"
+                        prompt_type="qa",
+                        on_token=on_token
                     )
\ No newline at end of file
@@ -1,10 +1,17 @@
-from app.utils.llm import GroqModel
-from app.prompts.base import PromptHandler
+from app.utils.llm import get_llm
+from app.prompts.registry import PromptRegistry
   
 
 class ReflectionChain:
+    # Templates used by the methods below, checked when the chain is created
+    PROMPTS = [
+        ("summarization", "reflection"),
+        ("question_answering", "relevant_block"),
+    ]
+
     def __init__(self):
-        self.model = GroqModel()
+        PromptRegistry.load(self.PROMPTS)
+        self.model = get_llm()
 
     def run(self, context_history: list[dict[str, str]] = None,prompt_type="reflection",feature="summarization", **kwargs) -> str:
 
@@ -13,16 +20,16 @@ class ReflectionChain:
 
         prompt_args = {**kwargs}
 
-        prompt = PromptHandler(
-            feature=feature,  
+        prompt = PromptRegistry.build(
+            feature=feature,
             prompt_type=prompt_type,
             **prompt_args
-        )._load_prompt()
+        )
 
         history = context_history.copy()
         history.append({"role": "user", "content": prompt})
 
-        critique = self.model.chat_completion(history)
+        critique = self.model.chat_completion(history, feature=feature, prompt_type=prompt_type)
 
         history.append({"role": "assistant", "content": critique})
 
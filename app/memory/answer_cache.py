@@ -0,0 +1,118 @@
+import os
+import json
+import time
+import threading
+from typing import List, Optional
+import numpy as np
+
+
+class AnswerCache:
+    """
+    Semantic cache of knowledge-base answers.
+
+    Entries are keyed by the question embedding and the retrieval settings: a new
+    question asked with the same settings (k, hybrid, context budget) whose cosine
+    similarity to a cached one reaches `threshold` gets the stored answer and block
+    URLs back. Entries are scoped per project inside the project's persist
+    directory, expire after `ttl_seconds`, are evicted least-recently-used beyond
+    `max_entries`, and are all dropped when the index version changes (re-index).
+    """
+
+    FILE_NAME = "answer_cache.json"
+
+    def __init__(self, persist_directory: str, project: str, threshold: float = 0.92, max_entries: int = 200, ttl_seconds: float = 7 * 24 * 3600):
+        self.path = os.path.join(persist_directory, self.FILE_NAME)
+        self.project = project
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.path):
+            return {"index_version": None, "projects": {}}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (ValueError, OSError):
+            return {"index_version": None, "projects": {}}
+
+    def _save(self, data: dict):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def _entries(self, data: dict, index_version: str) -> list:
+        # A re-index invalidates every cached answer
+        if data.get("index_version") != index_version:
+            data["index_version"] = index_version
+            data["projects"] = {}
+        now = time.time()
+        entries = [
+            entry for entry in data["projects"].get(self.project, [])
+            if now - entry["created_at"] < self.ttl_seconds
+        ]
+        data["projects"][self.project] = entries
+        return entries
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    @staticmethod
+    def retrieval_key(**settings) -> str:
+        """Stable key for the retrieval settings an answer was built with, e.g. k=10;hybrid=False."""
+        return ";".join(f"{name}={settings[name]}" for name in sorted(settings))
+
+    def lookup(self, embedding, index_version: str, retrieval: str = "") -> Optional[dict]:
+        """
+        Returns the most similar cached entry ({"question", "answer", "urls",
+        "block_ids", "similarity"}) built with the same retrieval settings if it
+        reaches the threshold, else None.
+        """
+        with self._lock:
+            data = self._load()
+            # Answers built from a different retrieval (other k, hybrid on/off) do not count
+            entries = [entry for entry in self._entries(data, index_version) if entry.get("retrieval", "") == retrieval]
+            if not entries:
+                return None
+
+            query = self._normalize(embedding)
+            similarities = np.array([entry["embedding"] for entry in entries], dtype=np.float32) @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+
+            entry = entries[best]
+            entry["last_used"] = time.time()
+            self._save(data)
+            return {
+                "question": entry["question"],
+                "answer": entry["answer"],
+                "urls": entry["urls"],
+                "block_ids": entry["block_ids"],
+                "similarity": float(similarities[best])
+            }
+
+    def store(self, question: str, embedding, answer: str, urls: List[str], block_ids: str, index_version: str, retrieval: str = ""):
+        with self._lock:
+            data = self._load()
+            entries = self._entries(data, index_version)
+            now = time.time()
+            entries.append({
+                "question": question,
+                "embedding": self._normalize(embedding).tolist(),
+                "answer": answer,
+                "urls": urls,
+                "block_ids": block_ids,
+                "retrieval": retrieval,
+                "created_at": now,
+                "last_used": now
+            })
+            if len(entries) > self.max_entries:
+                entries.sort(key=lambda entry: entry["last_used"])
+                del entries[:len(entries) - self.max_entries]
+            self._save(data)
@@ -0,0 +1,109 @@
+import os
+import re
+import json
+import math
+from collections import Counter, defaultdict
+from typing import List, Tuple
+
+
+class BM25Index:
+    """
+    Small in-process BM25 inverted index over chunk records.
+
+    It complements the MiniLM vectors on exact terms (function names, acronyms,
+    formula names) that embeddings tend to blur. Built at index time from the same
+    records as Chroma and persisted as JSON next to the Chroma directory.
+    """
+
+    FILE_NAME = "bm25_index.json"
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids = []
+        self.doc_len = []
+        self.avgdl = 0.0
+        self.postings = {}  # term -> [[doc_index, term_frequency], ...]
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """
+        Lowercased word tokens. Identifiers like snake_case names are kept whole and
+        also split into their parts, so both "chunk_by_heading" and "heading" match.
+        """
+        tokens = []
+        for token in re.findall(r"\w+", text.lower()):
+            tokens.append(token)
+            if "_" in token:
+                tokens.extend(part for part in token.split("_") if part)
+        return tokens
+
+    def build(self, documents: List[Tuple[str, str]]):
+        """
+        Args:
+            documents (list[tuple]): (doc_id, text) pairs.
+        """
+        self.ids = []
+        self.doc_len = []
+        postings = defaultdict(list)
+
+        for doc_index, (doc_id, text) in enumerate(documents):
+            tokens = self.tokenize(text)
+            self.ids.append(doc_id)
+            self.doc_len.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings[term].append([doc_index, tf])
+
+        self.postings = dict(postings)
+        self.avgdl = sum(self.doc_len) / len(self.doc_len) if self.doc_len else 0.0
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Returns the k best (doc_id, bm25_score) pairs for query, best first.
+        """
+        n_docs = len(self.ids)
+        if not n_docs:
+            return []
+
+        scores = defaultdict(float)
+        for term in set(self.tokenize(query)):
+            term_postings = self.postings.get(term)
+            if not term_postings:
+                continue
+            df = len(term_postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_index, tf in term_postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_len[doc_index] / self.avgdl)
+                scores[doc_index] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.ids[doc_index], score) for doc_index, score in best]
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self.FILE_NAME)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "ids": self.ids,
+                "doc_len": self.doc_len,
+                "postings": self.postings
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, directory: str):
+        """Returns the index saved in directory, or None if there is none."""
+        path = os.path.join(directory, cls.FILE_NAME)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        index.ids = data["ids"]
+        index.doc_len = data["doc_len"]
+        index.postings = data["postings"]
+        index.avgdl = sum(index.doc_len) / len(index.doc_len) if index.doc_len else 0.0
+        return index
@@ -1,8 +1,6 @@
 import re
 from typing import List
-from langchain_experimental.text_splitter import SemanticChunker
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_core.documents import Document
+from app.memory.semantic_chunker import BatchSemanticChunker
 
 
 class SummaryChunker:
@@ -200,42 +198,49 @@ class SummaryChunker:
     def semantic_subchunk_paragraph(self, data_items, min_len_for_chunking=500):
         """
         Further chunk paragraphs using semantic similarity if they exceed a length threshold.
+        All long paragraphs are split in one batched pass (see BatchSemanticChunker).
 
         Parameters:
             data_items (list[dict]): List of dicts with keys: page, h1, h2, h3, paragraph, block_ids, combined_heading
             min_len_for_chunking (int): Minimum character length to apply semantic chunking
 
         Returns:
-            list[dict]: List with semantically sub-chunked paragraphs, preserving metadata and appending combined_heading
+            list[dict]: List with semantically sub-chunked paragraphs, preserving metadata and appending combined_heading,
+                        plus each sub-chunk's position in its paragraph ("subchunk")
         """
-        result = []
         model_name = "sentence-transformers/all-mpnet-base-v2"
-        embeddings = HuggingFaceEmbeddings(model_name=model_name)
-        splitter = SemanticChunker(embeddings, add_start_index=True)
+        splitter = BatchSemanticChunker(model_name=model_name)
+
+        # Split every long paragraph up front so their sentences share one embedding pass
+        long_items = [item for item in data_items if len(item["paragraph"].strip()) >= min_len_for_chunking]
+        subchunks_by_item = dict(zip(
+            map(id, long_items),
+            splitter.split_texts([item["paragraph"] for item in long_items])
+        ))
 
+        result = []
         for item in data_items:
             paragraph = item["paragraph"]
             combined_heading = item.get("combined_heading", "")
             metadata = {k: item.get(k) for k in ["page_id","page", "h1", "h2", "h3", "block_ids"]}
 
-            if len(paragraph.strip()) < min_len_for_chunking:
+            if id(item) not in subchunks_by_item:
                 # Skip semantic chunking and return original paragraph with combined_heading appended
                 result.append({
                     **metadata,
+                    "combined_heading": combined_heading,
+                    "subchunk": 0,
                     "paragraph": f"{combined_heading}:{paragraph.strip()}"
                 })
                 continue
 
-            # Create a Document with metadata
-            doc = Document(page_content=paragraph, metadata=metadata)
-
-            # Perform semantic chunking
-            subchunks = splitter.split_documents([doc])
-
-            for subdoc in subchunks:
+            # subchunk keeps the position so adjacent pieces can be merged back at query time
+            for position, subchunk in enumerate(subchunks_by_item[id(item)]):
                 result.append({
                     **metadata,
-                    "paragraph": f"{combined_heading}:{subdoc.page_content.strip()}"
+                    "combined_heading": combined_heading,
+                    "subchunk": position,
+                    "paragraph": f"{combined_heading}:{subchunk.strip()}"
                 })
 
         return result
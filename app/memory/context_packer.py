@@ -0,0 +1,159 @@
+import re
+from typing import List, Tuple
+
+from app.utils.tokens import count_tokens, CHARS_PER_TOKEN
+
+
+class ContextPacker:
+    """
+    Turns retrieval results into a token-budgeted QA context.
+
+    Retrieved chunks are taken in rank order (best first) and:
+    1. Adjacent sub-chunks of the same paragraph (same page and block IDs,
+       consecutive sub-chunk indices) are merged back into one passage, with the
+       combined heading written once.
+    2. Passages whose words are mostly covered by a passage already kept are dropped
+       as near-duplicates.
+    3. Passages are added until the token budget is full; ones that do not fit are
+       skipped so a smaller lower-ranked passage can still use the remaining space.
+
+    The kept passages double as the block list for select_block, so the block
+    selection prompt shrinks with the context.
+    """
+
+    def __init__(self, max_tokens: int = 2000, duplicate_threshold: float = 0.85):
+        """
+        Args:
+            max_tokens (int): Token budget of the packed context.
+            duplicate_threshold (float): Share of a passage's words already present in
+                a kept passage above which it is dropped.
+        """
+        self.max_tokens = max_tokens
+        self.duplicate_threshold = duplicate_threshold
+
+    @staticmethod
+    def _words(text: str) -> set:
+        return set(re.findall(r"\w+", text.lower()))
+
+    @staticmethod
+    def _body(paragraph: str, heading: str) -> str:
+        # Chunk paragraphs are stored as "<combined heading>:<text>"
+        if heading and paragraph.startswith(heading + ":"):
+            return paragraph[len(heading) + 1:].strip()
+        return paragraph.strip()
+
+    def _candidates(self, results) -> List[dict]:
+        candidates = []
+        for rank, (doc, score) in enumerate(results):
+            metadata = doc.metadata
+            subchunk = metadata.get("subchunk")
+            candidates.append({
+                "rank": rank,
+                "score": score,
+                "paragraph": metadata.get("paragraph", ""),
+                "heading": metadata.get("heading") or "",
+                "page_title": metadata.get("page", ""),
+                "page_id": metadata.get("page_id", ""),
+                "block_ids": metadata.get("block_ids", "").split(","),
+                "subchunk": int(subchunk) if subchunk is not None and subchunk != "" else None
+            })
+        return candidates
+
+    def _merge_adjacent(self, candidates: List[dict]) -> Tuple[List[dict], int]:
+        """Merges runs of consecutive sub-chunks of the same paragraph. Returns (passages, merged_count)."""
+        groups = {}
+        for candidate in candidates:
+            if candidate["subchunk"] is None:
+                # Indexed before sub-chunk positions were recorded: cannot tell adjacency
+                groups[("rank", candidate["rank"])] = [candidate]
+                continue
+            key = (candidate["page_id"], tuple(candidate["block_ids"]))
+            groups.setdefault(key, []).append(candidate)
+
+        passages = []
+        for members in groups.values():
+            members.sort(key=lambda member: member["subchunk"] if member["subchunk"] is not None else 0)
+            run = [members[0]]
+            for member in members[1:]:
+                if run[-1]["subchunk"] is not None and member["subchunk"] == run[-1]["subchunk"] + 1:
+                    run.append(member)
+                else:
+                    passages.append(self._join(run))
+                    run = [member]
+            passages.append(self._join(run))
+        merged = len(candidates) - len(passages)
+        passages.sort(key=lambda passage: passage["rank"])
+        return passages, merged
+
+    def _join(self, run: List[dict]) -> dict:
+        best = min(run, key=lambda member: member["rank"])
+        if len(run) == 1:
+            content = best["paragraph"].strip()
+        else:
+            heading = best["heading"]
+            body = " ".join(self._body(member["paragraph"], heading) for member in run)
+            content = f"{heading}:{body}" if heading else body
+        return {
+            "rank": best["rank"],
+            "score": best["score"],
+            "content": content,
+            "page_title": best["page_title"],
+            "page_id": best["page_id"],
+            "block_ids": best["block_ids"]
+        }
+
+    def pack(self, results) -> Tuple[str, List[dict], dict]:
+        """
+        Args:
+            results (list): (Document, score) pairs from retrieval, best first.
+
+        Returns:
+            tuple: (context, blocks_list, stats), where blocks_list holds the kept
+                passages ({"content", "page_title", "page_id", "block_ids"}) and stats
+                counts retrieved, merged, duplicate and over-budget chunks plus tokens.
+        """
+        candidates = self._candidates(results)
+        passages, merged = self._merge_adjacent(candidates)
+
+        kept_words = []
+        blocks_list = []
+        context_parts = []
+        used_tokens = 0
+        duplicates = 0
+        over_budget = 0
+
+        for passage in passages:
+            words = self._words(passage["content"])
+            if words and any(len(words & kept) / len(words) >= self.duplicate_threshold for kept in kept_words):
+                duplicates += 1
+                continue
+
+            content = passage["content"]
+            tokens = count_tokens(content)
+            if used_tokens + tokens > self.max_tokens:
+                if blocks_list:
+                    over_budget += 1
+                    continue
+                # Never send an empty context: truncate the best passage to the budget
+                content = content[:self.max_tokens * CHARS_PER_TOKEN]
+                tokens = count_tokens(content)
+
+            kept_words.append(words)
+            used_tokens += tokens
+            context_parts.append(content)
+            blocks_list.append({
+                "content": content,
+                "page_title": passage["page_title"],
+                "page_id": passage["page_id"],
+                "block_ids": passage["block_ids"]
+            })
+
+        stats = {
+            "retrieved": len(candidates),
+            "merged": merged,
+            "duplicates": duplicates,
+            "over_budget": over_budget,
+            "passages": len(blocks_list),
+            "tokens": used_tokens
+        }
+        return "\n\n".join(context_parts), blocks_list, stats
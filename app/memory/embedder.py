@@ -1,7 +1,7 @@
 import os
 from typing import List
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
+from app.memory.model_registry import ModelRegistry
 
 load_dotenv()
 
@@ -17,11 +17,12 @@ class Embedder:
                                        "multi-qa-MiniLM-L6-cos-v1" (optimized for retrieval),
                                        or any other SentenceTransformer model.
         """
-        self.model = SentenceTransformer(model)
+        self.model_name = model
+        self.model = ModelRegistry.get(model)
         self.dim = self.model.get_sentence_embedding_dimension()
         
     def embed_text(self, text: str):
-        return self.model.encode([text])[0]
+        return ModelRegistry.encode(self.model_name, [text])[0]
 
     def embed_texts(self, texts: List[str]) -> List[List[float]]:
         """
@@ -33,8 +34,8 @@ class Embedder:
         Returns:
             List[List[float]]: Corresponding embedding vectors
         """
-        # Convert texts to embeddings
-        embeddings = self.model.encode(texts, convert_to_tensor=False)
+        # Convert texts to embeddings, reusing cached vectors for text seen before
+        embeddings = ModelRegistry.encode(self.model_name, texts)
         
         # Convert numpy arrays to lists of floats
         return [embedding.tolist() for embedding in embeddings]
\ No newline at end of file
@@ -0,0 +1,232 @@
+import os
+import re
+import json
+import time
+import atexit
+import hashlib
+import threading
+from pathlib import Path
+from typing import Callable, List
+import numpy as np
+
+EMBEDDING_CACHE_DIR = Path(__file__).resolve().parents[2] / "embedding_cache"
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache for one model.
+
+    Vectors live in a memory-mapped .npy matrix (one row per text) and a JSON index
+    maps the text hash to its row. Rows are flushed as they are written, but the
+    index is rewritten at most every SAVE_INTERVAL seconds and on flush() (called at
+    exit), so many small batches do not each rewrite the whole index. A crash loses
+    at most the entries added since the last save and never points the index at a
+    half-written row.
+    """
+
+    SAVE_INTERVAL = 10.0
+
+    def __init__(self, model_name: str, cache_dir: str = None, dtype: str = "float32", max_entries: int = 200_000, initial_capacity: int = 1024):
+        """
+        Args:
+            model_name (str): Model the vectors belong to; part of every key.
+            cache_dir (str): Directory for this model's files. Defaults to
+                             embedding_cache/<model_name> at the project root.
+            dtype (str): "float32" or "float16" storage for the matrix.
+            max_entries (int): Upper bound on cached vectors; least recently used
+                               rows are evicted beyond it.
+            initial_capacity (int): Rows allocated when the matrix is first created.
+        """
+        self.model_name = model_name
+        safe_name = re.sub(r"[^\w.-]", "_", model_name)
+        self.cache_dir = str(cache_dir or EMBEDDING_CACHE_DIR / safe_name)
+        self.dtype = np.dtype(dtype)
+        self.max_entries = max_entries
+        self.initial_capacity = min(initial_capacity, max_entries)
+
+        self.vectors_path = os.path.join(self.cache_dir, "vectors.npy")
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._rows = {}       # key -> row
+        self._last_used = {}  # key -> tick of last access, for LRU eviction
+        self._free_rows = []
+        self._next_row = 0
+        self._tick = 0
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._load()
+        atexit.register(self.flush)
+
+    # --- persistence ---
+    def _load(self):
+        if not (os.path.exists(self.index_path) and os.path.exists(self.vectors_path)):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            vectors = np.load(self.vectors_path, mmap_mode="r+")
+        except (ValueError, OSError) as e:
+            print(f"[EmbeddingCache] Ignoring unreadable cache in {self.cache_dir}: {e}")
+            return
+        if vectors.dtype != self.dtype:
+            print(f"[EmbeddingCache] Cache dtype {vectors.dtype} != {self.dtype}, starting empty.")
+            return
+
+        self._vectors = vectors
+        self._tick = index.get("tick", 0)
+        for key, (row, last_used) in index.get("entries", {}).items():
+            self._rows[key] = row
+            self._last_used[key] = last_used
+        self._next_row = index.get("next_row", len(self._rows))
+        used = set(self._rows.values())
+        self._free_rows = [row for row in range(self._next_row) if row not in used]
+
+    def _save_index(self):
+        index = {
+            "model_name": self.model_name,
+            "dtype": self.dtype.name,
+            "tick": self._tick,
+            "next_row": self._next_row,
+            "entries": {key: [row, self._last_used[key]] for key, row in self._rows.items()},
+        }
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    def flush(self):
+        """Writes the index if entries were added since it was last saved."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def _ensure_capacity(self, dim: int, rows_needed: int):
+        if self._vectors is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            capacity = max(self.initial_capacity, rows_needed)
+            self._vectors = np.lib.format.open_memmap(
+                self.vectors_path, mode="w+", dtype=self.dtype, shape=(capacity, dim)
+            )
+            return
+        if self._vectors.shape[1] != dim:
+            raise ValueError(f"Embedding dim {dim} does not match cached dim {self._vectors.shape[1]} for {self.model_name}")
+        if rows_needed <= self._vectors.shape[0]:
+            return
+
+        # Grow by doubling: copy into a new file, then swap it in
+        capacity = min(max(self._vectors.shape[0] * 2, rows_needed), self.max_entries)
+        tmp_path = self.vectors_path + ".tmp.npy"
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=self.dtype, shape=(capacity, dim))
+        grown[:self._vectors.shape[0]] = self._vectors
+        grown.flush()
+        del grown
+        self._vectors.flush()
+        self._vectors = None
+        os.replace(tmp_path, self.vectors_path)
+        self._vectors = np.load(self.vectors_path, mmap_mode="r+")
+
+    def _evict(self, count: int):
+        # Drop the least recently used entries and recycle their rows
+        victims = sorted(self._last_used, key=self._last_used.get)[:count]
+        for key in victims:
+            self._free_rows.append(self._rows.pop(key))
+            del self._last_used[key]
+        self.evictions += len(victims)
+
+    # --- public API ---
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def encode(self, texts: List[str], encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Returns embeddings for texts, running encode_fn only on texts not cached yet.
+
+        Args:
+            texts (List[str]): Texts to embed.
+            encode_fn (Callable): Embeds a list of texts, e.g. SentenceTransformer.encode.
+
+        Returns:
+            np.ndarray: float32 matrix with one row per input text, in input order.
+        """
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        keys = [self.key(text) for text in texts]
+        found = {}
+
+        with self._lock:
+            self._tick += 1
+            for key in set(keys):
+                row = self._rows.get(key)
+                if row is not None:
+                    found[key] = np.array(self._vectors[row], dtype=np.float32)
+                    self._last_used[key] = self._tick
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+
+        # Embed each missing text once, outside the lock
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            computed = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+            for key, vector in zip(missing, computed):
+                found[key] = vector
+            self._store(list(missing), computed)
+
+        return np.stack([found[key] for key in keys])
+
+    def _store(self, keys: List[str], vectors: np.ndarray):
+        with self._lock:
+            # Another thread may have stored some of these while we were encoding
+            fresh = [i for i, key in enumerate(keys) if key not in self._rows][-self.max_entries:]
+            if not fresh:
+                return
+            keys = [keys[i] for i in fresh]
+            vectors = vectors[fresh]
+
+            overflow = len(self._rows) + len(keys) - self.max_entries
+            if overflow > 0:
+                # Evict a little extra so we do not sort the index on every batch
+                self._evict(max(overflow, self.max_entries // 10))
+                # The freed rows are about to be overwritten: the saved index must not point at them
+                self._save_index()
+
+            rows = []
+            for _ in keys:
+                if self._free_rows:
+                    rows.append(self._free_rows.pop())
+                else:
+                    rows.append(self._next_row)
+                    self._next_row += 1
+            self._ensure_capacity(vectors.shape[1], self._next_row)
+
+            self._vectors[rows] = vectors.astype(self.dtype)
+            self._vectors.flush()
+            for key, row in zip(keys, rows):
+                self._rows[key] = row
+                self._last_used[key] = self._tick
+            self._dirty = True
+            if time.monotonic() - self._last_save >= self.SAVE_INTERVAL:
+                self._save_index()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "model_name": self.model_name,
+            "entries": len(self._rows),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
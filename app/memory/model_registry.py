@@ -0,0 +1,123 @@
+import threading
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from sentence_transformers import SentenceTransformer
+from app.memory.embedding_cache import EmbeddingCache
+
+
+def _normalize_name(model_name: str) -> str:
+    # "all-MiniLM-L6-v2" and "sentence-transformers/all-MiniLM-L6-v2" are the same model
+    if "/" not in model_name:
+        return f"sentence-transformers/{model_name}"
+    return model_name
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """
+    LangChain Embeddings adapter around a shared SentenceTransformer, so Chroma and
+    the chunkers reuse the model loaded by the registry instead of loading their own.
+    """
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    @property
+    def model(self) -> SentenceTransformer:
+        return ModelRegistry.get(self.model_name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        embeddings = ModelRegistry.encode(self.model_name, texts)
+        return [embedding.tolist() for embedding in embeddings]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class ModelRegistry:
+    """
+    Process-wide registry that loads each SentenceTransformer once, on first use,
+    and hands the same instance to every caller.
+    """
+
+    _models = {}
+    _embeddings = {}
+    _caches = {}
+    _load_locks = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, model_name: str) -> SentenceTransformer:
+        """
+        Returns the shared SentenceTransformer for model_name, loading it if needed.
+        Concurrent first calls for the same model wait for a single load.
+        """
+        key = _normalize_name(model_name)
+        model = cls._models.get(key)
+        if model is not None:
+            return model
+
+        with cls._lock:
+            load_lock = cls._load_locks.setdefault(key, threading.Lock())
+
+        # Per-model lock so loading one model does not block callers of another
+        with load_lock:
+            model = cls._models.get(key)
+            if model is None:
+                model = SentenceTransformer(key)
+                cls._models[key] = model
+        return model
+
+    @classmethod
+    def embeddings(cls, model_name: str) -> SentenceTransformerEmbeddings:
+        """
+        Returns the shared LangChain Embeddings adapter for model_name.
+        The model itself is only loaded when the adapter first embeds something.
+        """
+        key = _normalize_name(model_name)
+        with cls._lock:
+            adapter = cls._embeddings.get(key)
+            if adapter is None:
+                adapter = SentenceTransformerEmbeddings(key)
+                cls._embeddings[key] = adapter
+        return adapter
+
+    @classmethod
+    def cache(cls, model_name: str) -> EmbeddingCache:
+        """
+        Returns the shared on-disk embedding cache for model_name.
+        """
+        key = _normalize_name(model_name)
+        with cls._lock:
+            cache = cls._caches.get(key)
+            if cache is None:
+                cache = EmbeddingCache(key)
+                cls._caches[key] = cache
+        return cache
+
+    @classmethod
+    def encode(cls, model_name: str, texts: List[str], **encode_kwargs) -> np.ndarray:
+        """
+        Embeds texts with the shared model, consulting the embedding cache first so
+        text seen in an earlier run is never re-encoded. encode_kwargs (e.g. batch_size)
+        are passed to SentenceTransformer.encode.
+        """
+        # The model is only loaded if at least one text misses the cache
+        def encode_misses(missing):
+            return cls.get(model_name).encode(missing, convert_to_tensor=False, **encode_kwargs)
+
+        return cls.cache(model_name).encode(list(texts), encode_misses)
+
+    @classmethod
+    def flush_caches(cls):
+        """Saves the index of every embedding cache with unsaved entries."""
+        with cls._lock:
+            caches = list(cls._caches.values())
+        for cache in caches:
+            cache.flush()
+
+    @classmethod
+    def cache_stats(cls) -> List[dict]:
+        with cls._lock:
+            caches = list(cls._caches.values())
+        return [cache.stats() for cache in caches]
@@ -0,0 +1,89 @@
+import re
+from typing import List
+import numpy as np
+from app.memory.model_registry import ModelRegistry
+
+
+class BatchSemanticChunker:
+    """
+    Semantic splitter that works on many texts at once.
+
+    Follows the same algorithm as LangChain's SemanticChunker (sentence split,
+    buffered sentence windows, cosine distance between neighbours, percentile
+    breakpoints), but all sentence windows of all texts are embedded in one batched
+    pass and the distance/breakpoint math is done with NumPy.
+    """
+
+    SENTENCE_SPLIT_REGEX = r"(?<=[.?!])\s+"
+
+    def __init__(self, model_name: str = "sentence-transformers/all-mpnet-base-v2", buffer_size: int = 1, breakpoint_percentile: float = 95.0, batch_size: int = 128):
+        """
+        Args:
+            model_name (str): SentenceTransformer used to embed sentence windows.
+            buffer_size (int): Neighbouring sentences on each side included in a window.
+            breakpoint_percentile (float): Distances above this percentile of a text's
+                                           distances start a new chunk.
+            batch_size (int): Encode batch size for the single embedding pass.
+        """
+        self.model_name = model_name
+        self.buffer_size = buffer_size
+        self.breakpoint_percentile = breakpoint_percentile
+        self.batch_size = batch_size
+
+    def split_sentences(self, text: str) -> List[str]:
+        return [s for s in re.split(self.SENTENCE_SPLIT_REGEX, text.strip()) if s]
+
+    def _windows(self, sentences: List[str]) -> List[str]:
+        # Each sentence plus buffer_size neighbours on both sides
+        return [
+            " ".join(sentences[max(0, i - self.buffer_size): i + self.buffer_size + 1])
+            for i in range(len(sentences))
+        ]
+
+    def split_texts(self, texts: List[str]) -> List[List[str]]:
+        """
+        Splits every text into semantically coherent chunks.
+
+        Args:
+            texts (List[str]): Texts to split.
+
+        Returns:
+            List[List[str]]: For each input text, its chunks in order.
+        """
+        sentences_per_text = [self.split_sentences(text) for text in texts]
+
+        # Flatten the windows of every multi-sentence text into one embedding batch
+        windows = []
+        offsets = []
+        for sentences in sentences_per_text:
+            offsets.append(len(windows))
+            if len(sentences) > 1:
+                windows.extend(self._windows(sentences))
+
+        distances = np.zeros(0, dtype=np.float32)
+        if windows:
+            embeddings = ModelRegistry.encode(self.model_name, windows, batch_size=self.batch_size)
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+            # distances[i] = 1 - cos(window i, window i + 1); pairs that straddle two
+            # texts are computed too but never read
+            distances = 1.0 - np.einsum("ij,ij->i", embeddings[:-1], embeddings[1:])
+
+        results = []
+        for text, sentences, offset in zip(texts, sentences_per_text, offsets):
+            if len(sentences) <= 1:
+                results.append([text.strip()] if text.strip() else [])
+                continue
+
+            text_distances = distances[offset: offset + len(sentences) - 1]
+            threshold = np.percentile(text_distances, self.breakpoint_percentile)
+            breakpoints = np.flatnonzero(text_distances > threshold) + 1
+
+            bounds = [0, *breakpoints.tolist(), len(sentences)]
+            results.append([
+                " ".join(sentences[start:end])
+                for start, end in zip(bounds[:-1], bounds[1:])
+                if start < end
+            ])
+
+        return results
@@ -1,13 +1,32 @@
+import os
+import uuid
+import hashlib
 from langchain_community.vectorstores import Chroma
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from app.memory.model_registry import ModelRegistry
+from app.memory.bm25_index import BM25Index
+
+
+def chunk_id(item: dict) -> str:
+    """
+    Builds a stable ID for a chunk record from its page_id, block_ids and a hash
+    of its content. The same chunk always gets the same ID across rebuilds, and
+    any edit to the paragraph text produces a new one.
+    """
+    block_hash = hashlib.sha1(",".join(item["block_ids"]).encode("utf-8")).hexdigest()[:12]
+    content_hash = hashlib.sha1(item["paragraph"].encode("utf-8")).hexdigest()[:16]
+    return f"{item['page_id']}:{block_hash}:{content_hash}"
 
 
 class VectorStore:
+    # Chroma rejects add/delete calls above its max batch size (~5k)
+    BATCH_SIZE = 1000
+    INDEX_VERSION_FILE = "index_version"
+
     def __init__(self, persist_directory="chroma_db"):
         self.persist_directory = persist_directory
-        self.embedder = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+        self.embedder = ModelRegistry.embeddings("all-MiniLM-L6-v2")
 
         # Try to load existing Chroma DB or create a new one
         try:
@@ -18,29 +37,118 @@ class VectorStore:
         except Exception:
             self.vector_store = None  # Will be created with from_documents()
 
+        self.bm25 = None  # loaded lazily by hybrid_retrieve()
+
+    def _to_document(self, item: dict, item_id: str) -> Document:
+        return Document(
+            page_content=f"{item['paragraph']}",
+            metadata={
+                "chunk_id": item_id,
+                "paragraph": item["paragraph"],
+                "block_ids": ",".join(item["block_ids"]),
+                "page": item["page"],
+                "page_id": item["page_id"],
+                "heading": item.get("combined_heading", ""),
+                "subchunk": item.get("subchunk", 0)
+            }
+        )
+
+    def _open_collection(self):
+        if self.vector_store is None:
+            self.vector_store = Chroma(
+                embedding_function=self.embedder,
+                persist_directory=self.persist_directory
+            )
+        return self.vector_store
+
+    def _delete_stale(self, chunks_by_id: dict) -> tuple:
+        """Deletes stored chunks whose ID is not in chunks_by_id. Returns (stale_ids, previously stored IDs)."""
+        existing_ids = set(self.vector_store.get(include=[])["ids"])
+        stale_ids = [item_id for item_id in existing_ids if item_id not in chunks_by_id]
+        for start in range(0, len(stale_ids), self.BATCH_SIZE):
+            self.vector_store.delete(ids=stale_ids[start:start + self.BATCH_SIZE])
+        return stale_ids, existing_ids
+
+    def _add(self, chunks_by_id: dict, ids: list):
+        # Chroma adds are upserts: re-adding a stored ID replaces its embedding
+        for start in range(0, len(ids), self.BATCH_SIZE):
+            batch_ids = ids[start:start + self.BATCH_SIZE]
+            docs = [self._to_document(chunks_by_id[item_id], item_id) for item_id in batch_ids]
+            self.vector_store.add_documents(docs, ids=batch_ids)
+
     def index_documents(self, all_chunks):
         """
+        Rebuilds the collection from all_chunks: every chunk is re-embedded, and stored
+        chunks that are no longer in all_chunks (deleted or edited blocks) are removed,
+        so the vector and BM25 indexes hold the same chunk set.
+
         all_chunks: list of dicts with 'combined_heading', 'paragraph', 'block_ids', 'page'
         """
-        docs = [
-            Document(
-                page_content=f"{item['paragraph']}",
-                metadata={
-                    "paragraph": item["paragraph"],
-                    "block_ids": ",".join(item["block_ids"]),
-                    "page": item["page"],
-                    "page_id": item["page_id"]
-                }
-            )
-            for item in all_chunks
-        ]
+        chunks_by_id = {chunk_id(item): item for item in all_chunks}
 
-        self.vector_store = Chroma.from_documents(
-            documents=docs,
-            embedding=self.embedder,
-            persist_directory=self.persist_directory
-        )
+        self._open_collection()
+        self._delete_stale(chunks_by_id)
+        self._add(chunks_by_id, list(chunks_by_id))
         self.vector_store.persist()
+        self._build_bm25(chunks_by_id)
+
+    def _build_bm25(self, chunks_by_id: dict):
+        # The lexical index always mirrors the full current chunk set
+        self.bm25 = BM25Index()
+        self.bm25.build([(item_id, item["paragraph"]) for item_id, item in chunks_by_id.items()])
+        self.bm25.save(self.persist_directory)
+        self._bump_index_version()
+
+    def _bump_index_version(self):
+        # Anything derived from the index (e.g. the answer cache) compares against this
+        os.makedirs(self.persist_directory, exist_ok=True)
+        with open(os.path.join(self.persist_directory, self.INDEX_VERSION_FILE), "w") as f:
+            f.write(uuid.uuid4().hex)
+
+    def index_version(self) -> str:
+        """Token that changes every time the collection is (re-)indexed."""
+        path = os.path.join(self.persist_directory, self.INDEX_VERSION_FILE)
+        if not os.path.exists(path):
+            return ""
+        with open(path, "r") as f:
+            return f.read().strip()
+
+    def has_index(self) -> bool:
+        """
+        True once the collection has been indexed. Opening Chroma already creates its
+        files in persist_directory, so a non-empty directory is not a reliable sign.
+        """
+        if os.path.exists(os.path.join(self.persist_directory, self.INDEX_VERSION_FILE)):
+            return True
+        # Collections indexed before index_version was written
+        return self.vector_store is not None and len(self.vector_store.get(include=[])["ids"]) > 0
+
+    def upsert_documents(self, all_chunks) -> dict:
+        """
+        Incrementally syncs the collection with all_chunks. Only chunks whose ID is
+        not already stored get embedded and added; stored chunks that no longer
+        appear in all_chunks (edited or deleted blocks) are removed.
+
+        Args:
+            all_chunks (list[dict]): The full, current set of chunk records.
+
+        Returns:
+            dict: Counts of "added", "deleted" and "unchanged" chunks.
+        """
+        chunks_by_id = {chunk_id(item): item for item in all_chunks}
+
+        self._open_collection()
+        stale_ids, existing_ids = self._delete_stale(chunks_by_id)
+        new_ids = [item_id for item_id in chunks_by_id if item_id not in existing_ids]
+        self._add(chunks_by_id, new_ids)
+        self.vector_store.persist()
+        self._build_bm25(chunks_by_id)
+
+        return {
+            "added": len(new_ids),
+            "deleted": len(stale_ids),
+            "unchanged": len(chunks_by_id) - len(new_ids)
+        }
 
     def add_documents(self, texts_with_metadata: list):
         """
@@ -55,3 +163,49 @@ class VectorStore:
 
     def retrieve_by_vector(self, query_embedding, k=3):
         return self.vector_store.similarity_search_by_vector(query_embedding, k=k)
+
+    def hybrid_retrieve(self, query: str, k=3, fetch_k: int = None, rrf_k: int = 60):
+        """
+        Fuses Chroma similarity hits with BM25 hits using reciprocal rank fusion.
+
+        Args:
+            query (str): The user question.
+            k (int): Number of fused results to return.
+            fetch_k (int): Candidates taken from each retriever (default 4 * k).
+            rrf_k (int): RRF damping constant; each list contributes 1 / (rrf_k + rank).
+
+        Returns:
+            list[tuple[Document, float]]: Best first, with the fused RRF score
+            (higher is better).
+        """
+        fetch_k = fetch_k or 4 * k
+        if self.bm25 is None:
+            self.bm25 = BM25Index.load(self.persist_directory)
+        vector_hits = self.vector_store.similarity_search_with_score(query, k=fetch_k)
+        if self.bm25 is None:
+            print("[VectorStore] No BM25 index found, re-index to enable hybrid retrieval. Using vector search only.")
+            return vector_hits[:k]
+
+        docs = {}
+        fused = {}
+        for rank, (doc, _) in enumerate(vector_hits):
+            item_id = doc.metadata.get("chunk_id") or chunk_id({
+                "page_id": doc.metadata.get("page_id", ""),
+                "block_ids": doc.metadata.get("block_ids", "").split(","),
+                "paragraph": doc.metadata.get("paragraph", "")
+            })
+            docs[item_id] = doc
+            fused[item_id] = fused.get(item_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+        for rank, (item_id, _) in enumerate(self.bm25.search(query, k=fetch_k)):
+            fused[item_id] = fused.get(item_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+
+        best_ids = sorted(fused, key=fused.get, reverse=True)[:k]
+
+        # Lexical-only hits are not in the vector results; fetch them by ID
+        missing = [item_id for item_id in best_ids if item_id not in docs]
+        if missing:
+            stored = self.vector_store.get(ids=missing, include=["documents", "metadatas"])
+            for item_id, text, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"]):
+                docs[item_id] = Document(page_content=text, metadata=metadata)
+
+        return [(docs[item_id], fused[item_id]) for item_id in best_ids if item_id in docs]
@@ -1,4 +1,4 @@
-import importlib
+from app.prompts.registry import PromptRegistry
 
 class PromptHandler:
     def __init__(self, feature: str, prompt_type: str, **kwargs):
@@ -6,26 +6,19 @@ class PromptHandler:
         feature: e.g. 'summarization'
         prompt_type: e.g. 'generation'
         kwargs: data needed to build the prompt (e.g. raw_notes)
+
+        The prompt is built once, here, through the PromptRegistry.
         """
         self.feature = feature
         self.prompt_type = prompt_type
         self.kwargs = kwargs
-        self.prompt = self._load_prompt()
+        self.prompt = PromptRegistry.build(feature, prompt_type, **kwargs)
 
     def _load_prompt(self) -> str:
         """
-        Dynamically loads the prompt generator function from the module.
+        Returns the prompt built in __init__ (kept for older callers).
         """
-        module_path = f"app.prompts.{self.feature}.{self.prompt_type}_prompt"
-        module = importlib.import_module(module_path)
-
-        if not hasattr(module, "build_prompt"):
-            raise AttributeError(f"Module {module_path} must define a build_prompt(**kwargs) function.")
-
-        return module.build_prompt(**self.kwargs)
+        return self.prompt
 
     def get_prompt(self) -> str:
         return self.prompt
-
-
-
@@ -0,0 +1,79 @@
+import os
+import pkgutil
+import importlib
+import threading
+
+PROMPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROMPT_SUFFIX = "_prompt"
+
+
+class PromptRegistry:
+    """
+    Resolves every app.prompts.<feature>.<prompt_type>_prompt module once and
+    keeps their build_prompt functions, so building a prompt is a single function
+    call with no import lookups. The chains call load() when they are created, so a
+    missing or broken template fails at startup rather than mid-pipeline.
+
+    Prompt sizes are reported per call by the LLM metrics (prompt_chars and
+    prompt_tokens of every record, summarized by `llm stats`).
+    """
+
+    _builders = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _discover(cls) -> dict:
+        builders = {}
+        # Feature folders are namespace packages, which pkgutil does not list itself
+        for entry in sorted(os.scandir(PROMPTS_DIR), key=lambda entry: entry.name):
+            if not entry.is_dir() or entry.name.startswith(("_", ".")):
+                continue
+            for module_info in pkgutil.iter_modules([entry.path]):
+                if not module_info.name.endswith(PROMPT_SUFFIX):
+                    continue
+                module_path = f"app.prompts.{entry.name}.{module_info.name}"
+                module = importlib.import_module(module_path)
+                if not callable(getattr(module, "build_prompt", None)):
+                    raise AttributeError(f"Module {module_path} must define a build_prompt(**kwargs) function.")
+                builders[(entry.name, module_info.name[:-len(PROMPT_SUFFIX)])] = module.build_prompt
+        return builders
+
+    @classmethod
+    def builders(cls) -> dict:
+        """(feature, prompt_type) -> build_prompt, resolved on first use."""
+        if cls._builders is None:
+            with cls._lock:
+                if cls._builders is None:
+                    cls._builders = cls._discover()
+        return cls._builders
+
+    @classmethod
+    def load(cls, required=()) -> dict:
+        """
+        Resolves every template now and checks that the required ones exist.
+
+        Args:
+            required (iterable): (feature, prompt_type) pairs the caller will build.
+
+        Raises:
+            ValueError: If a required prompt module does not exist.
+        """
+        builders = cls.builders()
+        missing = [key for key in required if key not in builders]
+        if missing:
+            raise ValueError(f"Missing prompt template(s): {missing}. Available: {sorted(builders)}")
+        return builders
+
+    @classmethod
+    def build(cls, feature: str, prompt_type: str, **kwargs) -> str:
+        """
+        Builds the prompt for feature/prompt_type.
+
+        Raises:
+            ValueError: If no such prompt module exists.
+        """
+        builder = cls.builders().get((feature, prompt_type))
+        if builder is None:
+            raise ValueError(f"Unknown prompt '{feature}/{prompt_type}'. Available: {sorted(cls.builders())}")
+
+        return builder(**kwargs)
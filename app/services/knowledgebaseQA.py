@@ -1,15 +1,19 @@
 from app.memory.chunker import SummaryChunker
 from app.services.notion_manager import NotionManager
 from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain.schema import Document
 from app.memory.chunker import SummaryChunker
 from app.chains.generation_chain import GenerationChain
 from app.chains.reflection_chain import ReflectionChain
 from app.utils.markdown_parser import parse_between_delimiters
 from app.memory.vector_store_chroma import VectorStore
-import os, json, re, ast
+from app.memory.model_registry import ModelRegistry
+from app.memory.answer_cache import AnswerCache
+from app.memory.context_packer import ContextPacker
+import os, json, re, ast, time
+import threading
 import webbrowser
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 import warnings
 
 warnings.filterwarnings("ignore")  # Ignore all warnings
@@ -56,6 +60,30 @@ def make_notion_urls(page_title: str, page_id: str, block_ids=None):
     return urls
 
 
+def run_in_daemon_thread(fn, **kwargs) -> Future:
+    """
+    Runs fn(**kwargs) on a daemon thread and returns a Future for its result. Unlike
+    a ThreadPoolExecutor worker, a call that hangs past its timeout does not keep
+    the interpreter from exiting.
+    """
+    future = Future()
+
+    def target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(**kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=target, daemon=True).start()
+    return future
+
+
+class StreamCancelled(Exception):
+    """Raised from a streaming callback to stop an answer that already timed out."""
+
+
 def open_url_in_existing_tab(url):
     # Try to open URL in the same tab/window (new=0)
     webbrowser.open(url, new=0)
@@ -70,24 +98,52 @@ def open_url_in_existing_tab(url):
 
 
 class QueryPipeline:
-    def __init__(self, data_path: str = "/home/khairi/ai_assistant/data/AI-assistant", notion_project_id:str = "23cd95d8323d80f88765cce2de644966", persist_directory: str = "chroma_db"):
-        self.vector_store = VectorStore()
+    def __init__(self, data_path: str = "/home/khairi/ai_assistant/data/AI-assistant", notion_project_id:str = "23cd95d8323d80f88765cce2de644966", persist_directory: str = "chroma_db", answer_cache_threshold: float = 0.92, llm_timeout: float = 60.0, context_tokens: int = 2000):
+        self.vector_store = VectorStore(persist_directory=persist_directory)
         self.generation_chain = GenerationChain()
         self.reflection_chain = ReflectionChain()
         self.data_path = data_path
         self.notion = NotionManager(folder_id=notion_project_id)
         self.chunker = SummaryChunker()
-        self.embedder = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+        self.embedder = ModelRegistry.embeddings("all-MiniLM-L6-v2")
         self.persist_directory = persist_directory
+        self.llm_timeout = llm_timeout  # seconds allowed for each concurrent LLM call in answer_question
+        self.context_packer = ContextPacker(max_tokens=context_tokens)
+        self.answer_cache = AnswerCache(
+            persist_directory=persist_directory,
+            project=os.path.basename(os.path.normpath(data_path)),
+            threshold=answer_cache_threshold
+        )
 
-    def index_knowlegde_base(self, folder_name:str = ""):
+    def index_knowlegde_base(self, folder_name:str = "", incremental: bool = False, crawl_workers: int = 1):
+        """
+        Builds chunks.json from the Notion folder and indexes it into Chroma.
+
+        Args:
+            folder_name (str): Root folder name, stripped from the heading path.
+            incremental (bool): Sync with Notion even if chunks.json exists. Only pages
+                whose last_edited_time moved are re-fetched and re-chunked, and only
+                new or changed chunks are embedded; chunks whose blocks are gone are deleted.
+            crawl_workers (int): Pages fetched from Notion in parallel. 1 keeps the
+                sequential depth-first crawl.
+        """
         
         CHUNKS_PATH = os.path.join(self.data_path,"chunks.json")
         # check if data already exists
-        if not os.path.exists(CHUNKS_PATH):
+        if incremental:
+            all_chunks = self._sync_chunks(CHUNKS_PATH, folder_name=folder_name, crawl_workers=crawl_workers)
+
+            # Save chunks locally
+            with open(CHUNKS_PATH, "w") as f:
+                json.dump(all_chunks, f, indent=2)
+
+        elif not os.path.exists(CHUNKS_PATH):
     
             #metadata.json
-            pages = self.notion.get_pages_hierarchy(parent_id=self.notion.folder_id,folder_name=folder_name)
+            if crawl_workers > 1:
+                pages = self.notion.get_pages_hierarchy_concurrent(parent_id=self.notion.folder_id, folder_name=folder_name, max_workers=crawl_workers)
+            else:
+                pages = self.notion.get_pages_hierarchy(parent_id=self.notion.folder_id,folder_name=folder_name)
             #chunks.json
             results = self.notion.get_all_pages_in_hierarchy_grouped(pages, folder_name=folder_name)
             all_chunks = self.chunker.semantic_subchunk_paragraph(data_items=results)
@@ -105,68 +161,183 @@ class QueryPipeline:
         
         # Step 3: Index the chunks into Chroma
 
-        vector_store = VectorStore(persist_directory=self.persist_directory)
-        vector_store.index_documents(data)
+        vector_store = self.vector_store
+        if incremental:
+            counts = vector_store.upsert_documents(data)
+            print(f"[✔] Incremental index: {counts['added']} added, {counts['deleted']} deleted, {counts['unchanged']} unchanged.")
+        else:
+            vector_store.index_documents(data)
 
+        ModelRegistry.flush_caches()
         print("[✔] Data indexed successfully into Chroma.")
-
-    def answer_question(self, question: str):
-
-        # load the vectordb
-
-        vector_store = VectorStore(persist_directory=self.persist_directory)
-
-        results = vector_store.retrieve(
-            query=question,
-            k=10
+        for stats in ModelRegistry.cache_stats():
+            print(f"[i] Embedding cache {stats['model_name']}: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} reused).")
+
+    def _sync_chunks(self, chunks_path: str, folder_name: str = "", crawl_workers: int = 1) -> list[dict]:
+        """
+        Re-chunks only the pages that changed in Notion since the last sync and
+        merges them with the still-valid chunks from chunks_path.
+        """
+        pages, changed = self.notion.sync_pages_hierarchy(parent_id=self.notion.folder_id, folder_name=folder_name, max_workers=crawl_workers)
+
+        previous = []
+        if os.path.exists(chunks_path):
+            with open(chunks_path, "r") as f:
+                previous = json.load(f)
+        else:
+            # No earlier chunks to reuse: every page counts as changed
+            changed = set(pages)
+
+        results = self.notion.get_all_pages_in_hierarchy_grouped(pages, folder_name=folder_name, page_ids=changed)
+        new_chunks = self.chunker.semantic_subchunk_paragraph(data_items=results)
+        kept = [chunk for chunk in previous if chunk["page_id"] in pages and chunk["page_id"] not in changed]
+
+        # Keep chunks.json in hierarchy order
+        page_order = {page_id: i for i, page_id in enumerate(pages)}
+        return sorted(kept + new_chunks, key=lambda chunk: page_order[chunk["page_id"]])
+
+    def answer_question(self, question: str, k: int = 10, hybrid: bool = False, use_cache: bool = True, stream: bool = False):
+        """
+        Retrieves the k best chunks, answers the question from them and opens the
+        Notion block the answer came from.
+
+        Args:
+            question (str): The user question.
+            k (int): Number of chunks passed to the LLM.
+            hybrid (bool): Fuse BM25 and vector hits with reciprocal rank fusion
+                instead of vector similarity alone.
+            use_cache (bool): Serve near-identical questions from the answer cache.
+            stream (bool): Print the answer token by token as it is generated.
+
+        Returns:
+            list: The retrieval results, or [] when the answer came from the cache.
+        """
+
+        if use_cache:
+            question_embedding = self.embedder.embed_query(question)
+            index_version = self.vector_store.index_version()
+            retrieval = AnswerCache.retrieval_key(k=k, hybrid=hybrid, context_tokens=self.context_packer.max_tokens)
+            cached = self.answer_cache.lookup(question_embedding, index_version, retrieval=retrieval)
+            if cached:
+                print(f"\n⚡ Cached answer (similar to: \"{cached['question']}\", similarity {cached['similarity']:.3f})")
+                print("\n")
+                print("LLM Answer: \n")
+                print(cached["answer"])
+                print("\n")
+                print("block ids: \n")
+                print(cached["block_ids"])
+                for url in cached["urls"]:
+                    open_url_in_existing_tab(url)
+                return []
+
+        # reuse the vectordb opened in __init__ (shares the registry's embedding model)
+
+        if hybrid:
+            results = self.vector_store.hybrid_retrieve(query=question, k=k)
+        else:
+            results = self.vector_store.retrieve(
+                query=question,
+                k=k
+            )
+
+        # Merge adjacent sub-chunks, drop near-duplicates and fit the token budget;
+        # select_block only sees the passages that made it into the context
+        context, blocks_list, pack_stats = self.context_packer.pack(results)
+        print(
+            f"📦 Context: {pack_stats['passages']} passages from {pack_stats['retrieved']} chunks, "
+            f"~{pack_stats['tokens']} tokens ({pack_stats['merged']} merged, "
+            f"{pack_stats['duplicates']} near-duplicates, {pack_stats['over_budget']} over budget)"
         )
 
-        context = ""
-        blocks_list = []
-        for doc, score in results:
-            paragraph = doc.metadata.get("paragraph", "")
-            block_ids = doc.metadata.get("block_ids", "").split(",")
-            
-            page = doc.metadata.get("page", "")
-            page_id = doc.metadata.get("page_id", "")
-            blocks_list.append({
-                "content": paragraph,
-                "page_title": page,
-                "page_id": page_id,
-                "block_ids": block_ids
-            })
-            #print("Paragraph:", paragraph)
-            #print("Block IDs:", block_ids)
-            #print("Page:", page)
-            #print("Page_id:", page_id)
-            #print(f"Similarity Score: {score:.4f}")  # Lower is better if it's cosine distance
-            #print("------")
-
-            # Optionally include the score in the context too
-            context += f"{paragraph.strip()}\n(Similarity Score: {score:.4f})\n\n"
-
-
-        answer = self.generation_chain.question_answering(context=context, question=question)
+        # Answer generation and block selection only depend on the retrieval results,
+        # so both LLM calls run at the same time
+        timed_out = threading.Event()
+        if stream:
+            print("\n")
+            print("LLM Answer: \n")
+
+            def on_token(token):
+                # Closes the stream at the next token once the answer has timed out
+                if timed_out.is_set():
+                    raise StreamCancelled()
+                print(token, end="", flush=True)
+        else:
+            on_token = None
+
+        # Daemon threads: a call that never returns must not block the CLI at exit
+        started = time.monotonic()
+        answer_future = run_in_daemon_thread(self.generation_chain.question_answering, context=context, question=question, on_token=on_token)
+        block_future = run_in_daemon_thread(self.reflection_chain.select_block, question=question, retrieved_blocks=blocks_list)
+
+        answer = self._wait_for(answer_future, "Answer generation", started)
+        if not answer_future.done():
+            timed_out.set()
         #print("block ids:", blocks_list)
-        reflector_response = self.reflection_chain.select_block(question=question, retrieved_blocks=blocks_list)
+        reflector_response = self._wait_for(block_future, "Block selection", started)
         #print("reflector response: ", reflector_response)
-        block_ids = parse_between_delimiters(output=reflector_response, delimiter="<<blockids>>").strip("'")
-        page_id = parse_between_delimiters(output=reflector_response, delimiter="<<pageid>>").strip("'")
-        page_title = parse_between_delimiters(output=reflector_response, delimiter="<<pagetitle>>").strip("'")
-        print("\n")
-        print("LLM Answer: \n")
-        print(answer)
+        block_ids, urls = self._block_urls(reflector_response)
+        if not stream:
+            print("\n")
+            print("LLM Answer: \n")
+            print(answer)
         print("\n")
         print("block ids: \n")
         print(block_ids)
 
-        urls = make_notion_urls(page_title=page_title, page_id=page_id, block_ids=block_ids)
        # print("Generated URLs:", urls)
 
         
         for url in urls: 
             open_url_in_existing_tab(url)
+
+        # Do not cache partial results from a timed-out or failed call
+        if use_cache and answer and urls:
+            self.answer_cache.store(
+                question=question,
+                embedding=question_embedding,
+                answer=answer,
+                urls=urls,
+                block_ids=block_ids,
+                index_version=index_version,
+                retrieval=retrieval
+            )
         
 
-        return results  
-    
+        return results
+
+    def _wait_for(self, future, name: str, started: float) -> str:
+        """
+        Returns the future's result, or "" if it fails or is still running
+        llm_timeout seconds after `started`.
+        """
+        remaining = max(0.0, started + self.llm_timeout - time.monotonic())
+        try:
+            return future.result(timeout=remaining)
+        except FutureTimeoutError:
+            print(f"⏱ {name} timed out after {self.llm_timeout:.0f}s, continuing without it.")
+        except Exception as e:
+            print(f"❌ {name} failed: {e}")
+        return ""
+
+    def _block_urls(self, reflector_response: str):
+        """
+        Parses the select_block response into (block_ids, urls). Returns ("", [])
+        when the response is missing or malformed.
+        """
+        if not reflector_response:
+            return "", []
+        block_ids = parse_between_delimiters(output=reflector_response, delimiter="<<blockids>>")
+        page_id = parse_between_delimiters(output=reflector_response, delimiter="<<pageid>>")
+        page_title = parse_between_delimiters(output=reflector_response, delimiter="<<pagetitle>>")
+        if block_ids is None or page_id is None or page_title is None:
+            print("❌ Could not parse the selected block.")
+            return "", []
+
+        block_ids = block_ids.strip("'")
+        try:
+            urls = make_notion_urls(page_title=page_title.strip("'"), page_id=page_id.strip("'"), block_ids=block_ids)
+        except (ValueError, TypeError, AttributeError) as e:
+            # The model wrote something other than a list of block ID strings
+            print(f"❌ Could not build block links: {e}")
+            return block_ids, []
+        return block_ids, urls
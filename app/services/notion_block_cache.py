@@ -0,0 +1,81 @@
+import os
+import json
+from datetime import datetime, timezone
+
+
+def _parse_notion_time(timestamp: str) -> datetime:
+    return datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+
+
+class NotionBlockCache:
+    """
+    Local cache of each page's normalized blocks, keyed by page_id.
+
+    Layout:
+        <cache_dir>/index.json          page_id -> {"last_edited_time", "path"}
+        <cache_dir>/pages/<page_id>.json normalized blocks of that page
+    """
+
+    # Notion rounds last_edited_time to the minute, so an edit made right after a
+    # fetch can keep the same timestamp. Pages edited this recently are not trusted.
+    SETTLE_SECONDS = 120
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.pages_dir = os.path.join(cache_dir, "pages")
+        self.index_path = os.path.join(cache_dir, "index.json")
+        os.makedirs(self.pages_dir, exist_ok=True)
+
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    def _page_path(self, page_id: str) -> str:
+        return os.path.join(self.pages_dir, f"{page_id}.json")
+
+    def get_blocks(self, page_id: str, last_edited_time: str = None):
+        """
+        Returns the cached blocks of page_id if they were stored for the same
+        last_edited_time, otherwise None.
+        """
+        entry = self.index.get(page_id)
+        if not entry or last_edited_time is None or entry.get("last_edited_time") != last_edited_time:
+            return None
+        page_path = self._page_path(page_id)
+        if not os.path.exists(page_path):
+            return None
+        with open(page_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def put(self, page_id: str, blocks: list[dict], last_edited_time: str = None):
+        if last_edited_time is not None:
+            age = datetime.now(timezone.utc) - _parse_notion_time(last_edited_time)
+            if age.total_seconds() < self.SETTLE_SECONDS:
+                last_edited_time = None  # refetch on the next sync
+
+        with open(self._page_path(page_id), "w", encoding="utf-8") as f:
+            json.dump(blocks, f, ensure_ascii=False)
+        entry = self.index.setdefault(page_id, {})
+        entry["last_edited_time"] = last_edited_time
+
+    def get_path(self, page_id: str):
+        return self.index.get(page_id, {}).get("path")
+
+    def set_path(self, page_id: str, path: list[str]):
+        self.index.setdefault(page_id, {})["path"] = path
+
+    def prune(self, keep: set):
+        """Drops cache entries for pages that no longer exist in the hierarchy."""
+        for page_id in list(self.index):
+            if page_id not in keep:
+                del self.index[page_id]
+                page_path = self._page_path(page_id)
+                if os.path.exists(page_path):
+                    os.remove(page_path)
+
+    def save(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
@@ -0,0 +1,226 @@
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+def normalize_blocks(page_blocks: list[dict]) -> list[dict]:
+    """
+    Reduces raw Notion blocks to {"id", "type", "content"} dicts, with rich_text
+    flattened to plain strings so the result is easy to save as JSON.
+    """
+    normalized_blocks = []
+    for blk in page_blocks:
+        blk_type = blk.get("type")
+        content = blk.get(blk_type, {}) if blk_type else {}
+
+        # Optional: strip out rich_text for easier saving
+        if isinstance(content, dict) and "rich_text" in content:
+            content["rich_text"] = [
+                rt if isinstance(rt, str) else rt.get("plain_text", "") for rt in content["rich_text"]
+            ]
+
+        normalized_blocks.append({
+            "id": blk.get("id"),
+            "type": blk_type,
+            "content": content
+        })
+    return normalized_blocks
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by all crawler workers.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Args:
+            rate (float): Tokens added per second (sustained requests per second).
+            capacity (float): Maximum burst size. Defaults to rate.
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available, then consumes it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now >= self.paused_until:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait_time = (1 - self.tokens) / self.rate
+                else:
+                    wait_time = self.paused_until - now
+            time.sleep(wait_time)
+
+    def pause(self, seconds: float):
+        """Stops every worker from sending for `seconds` (used for Retry-After)."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+            self.updated = self.paused_until
+
+
+class NotionCrawler:
+    """
+    Concurrent replacement for the depth-first walk in NotionManager.get_pages_hierarchy.
+
+    Pages are fetched by a bounded worker pool. Every request goes through a shared
+    token bucket matched to Notion's request rate (about 3 requests/s), and 429
+    responses pause all workers for the Retry-After delay before retrying. Each
+    page's blocks are listed once and reused both as the page content and to
+    discover its child pages.
+    """
+
+    RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self, client, max_workers: int = 8, requests_per_second: float = 3.0, max_retries: int = 5):
+        """
+        Args:
+            client: A notion_client.Client, or any object exposing blocks.children.list.
+            max_workers (int): Pages fetched in parallel.
+            requests_per_second (float): Sustained request rate shared by all workers.
+            max_retries (int): Retries per request on 429 / 5xx responses.
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self.limiter = TokenBucket(requests_per_second)
+        self.max_retries = max_retries
+        self.cached_blocks = None
+        self.on_fetch = None
+        self.fetched = set()  # page_ids downloaded (not served from cache) by the last crawl
+
+    def _list_page(self, block_id: str, cursor: str = None) -> dict:
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                return self.client.blocks.children.list(
+                    block_id=block_id,
+                    start_cursor=cursor,
+                    page_size=100
+                )
+            except Exception as e:
+                status = getattr(e, "status", None)
+                if getattr(e, "code", None) == "rate_limited":
+                    status = 429
+                if status not in self.RETRYABLE_STATUS or attempt == self.max_retries:
+                    raise
+
+                headers = getattr(e, "headers", None) or {}
+                retry_after = headers.get("retry-after") or headers.get("Retry-After")
+                if retry_after is not None:
+                    delay = float(retry_after)
+                else:
+                    delay = min(30.0, 2 ** attempt) * (0.5 + random.random() / 2)
+                if status == 429:
+                    self.limiter.pause(delay)
+                else:
+                    time.sleep(delay)
+
+    def list_children(self, block_id: str) -> list[dict]:
+        """Returns every direct child block of block_id, following pagination."""
+        blocks = []
+        cursor = None
+        while True:
+            response = self._list_page(block_id, cursor)
+            blocks.extend(response.get("results", []))
+            if not response.get("has_more"):
+                break
+            cursor = response.get("next_cursor")
+        return blocks
+
+    def _child_pages(self, blocks: list[dict]) -> list[tuple[str, str]]:
+        pages = []
+        for block in blocks:
+            if block.get("type") == "child_page":
+                child = block.get("child_page") or block.get("content") or {}
+                pages.append((block["id"], child.get("title", "(untitled)")))
+        return pages
+
+    def _page_blocks(self, page_id: str) -> list[dict]:
+        # Normalized blocks, from the cache when the caller says they are still fresh
+        if self.cached_blocks is not None:
+            blocks = self.cached_blocks(page_id)
+            if blocks is not None:
+                return blocks
+        blocks = normalize_blocks(self.list_children(page_id))
+        self.fetched.add(page_id)
+        if self.on_fetch is not None:
+            self.on_fetch(page_id, blocks)
+        return blocks
+
+    def _fetch_page(self, page_id: str, title: str, parent_id: str):
+        blocks = self._page_blocks(page_id)
+        record = {
+            "id": page_id,
+            "title": title,
+            "parent_id": parent_id,
+            "blocks": blocks
+        }
+        return record, self._child_pages(blocks)
+
+    def crawl(self, root_id: str, on_page, cached_blocks=None, on_fetch=None) -> list[str]:
+        """
+        Crawls every page below root_id, handing each page record to on_page as
+        soon as it is fetched instead of keeping them all in memory.
+
+        Args:
+            root_id (str): The Notion page ID of the parent folder.
+            on_page (Callable): Called with each {"id", "title", "parent_id", "blocks"}
+                record, from the calling thread, parents before their children.
+            cached_blocks (Callable): Optional page_id -> normalized blocks (or None).
+                When it returns blocks the page is not requested from Notion.
+            on_fetch (Callable): Optional (page_id, blocks) hook for pages that were
+                downloaded, including root_id. Runs on worker threads.
+
+        Returns:
+            list[str]: Page ids in the same depth-first order as
+                       NotionManager.get_pages_hierarchy.
+        """
+        self.cached_blocks = cached_blocks
+        self.on_fetch = on_fetch
+        self.fetched = set()
+        children_of = {root_id: self._child_pages(self._page_blocks(root_id))}
+        seen = {root_id}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = {}
+
+            def submit_children(parent_id):
+                for page_id, title in children_of[parent_id]:
+                    if page_id in seen:
+                        continue
+                    seen.add(page_id)
+                    pending[pool.submit(self._fetch_page, page_id, title, parent_id)] = page_id
+
+            submit_children(root_id)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page_id = pending.pop(future)
+                    record, children = future.result()
+                    on_page(record)
+                    children_of[page_id] = children
+                    submit_children(page_id)
+
+        # Rebuild the pre-order the sequential crawl produces
+        order = []
+        visited = set()
+        stack = [page_id for page_id, _ in reversed(children_of[root_id])]
+        while stack:
+            page_id = stack.pop()
+            if page_id in visited or page_id not in children_of:
+                continue
+            visited.add(page_id)
+            order.append(page_id)
+            stack.extend(child_id for child_id, _ in reversed(children_of[page_id]))
+        return order
@@ -2,6 +2,9 @@ import os
 from notion_client import Client
 from dotenv import load_dotenv
 from app.utils.markdown_parser import markdown_to_notion_blocks
+from app.services.notion_crawler import NotionCrawler, normalize_blocks
+from app.services.notion_block_cache import NotionBlockCache
+from app.services.page_journal import PageJournal
 import json
 from pathlib import Path
 
@@ -245,22 +248,31 @@ class NotionManager:
 
 
 
-    def get_pages_hierarchy(self, parent_id: str, pages_meta: dict = None, folder_name: str = "AI-assistant") -> dict:
+    def get_pages_hierarchy(self, parent_id: str, pages_meta: dict = None, folder_name: str = "AI-assistant") -> PageJournal:
         """
         Recursively retrieve all child pages under a parent page (folder) in Notion
         using blocks.children.list to get direct children blocks.
 
+        Page records are streamed to metadata.jsonl as they are discovered and the
+        index is written once at the end (see PageJournal), so crawl I/O is linear.
+
         :param parent_id: The Notion page ID of the parent folder.
-        :param pages_meta: A dictionary to store metadata for all retrieved pages.
-        :return: Dictionary with page_id as keys and metadata as values.
+        :param pages_meta: Optional dict that also receives every record (keeps all blocks in memory).
+        :return: PageJournal mapping page_id -> metadata, in depth-first order.
         """
-        if pages_meta is None:
-            pages_meta = {}
-
         base_dir = getattr(self, "output_dir", "data")
         output_dir = os.path.join(base_dir, folder_name)
-        os.makedirs(output_dir, exist_ok=True)
 
+        journal = PageJournal(output_dir).open()
+        try:
+            self._walk_pages_hierarchy(parent_id, journal, pages_meta)
+        finally:
+            journal.close()
+
+        return journal
+
+
+    def _walk_pages_hierarchy(self, parent_id: str, journal: PageJournal, pages_meta: dict = None):
         cursor = None
         while True:
             response = self.notion.blocks.children.list(
@@ -289,63 +301,180 @@ class NotionManager:
                         block_cursor = block_resp.get("next_cursor")
 
                     # Clean and normalize block content for JSON
-                    normalized_blocks = []
-                    for blk in page_blocks:
-                        blk_type = blk.get("type")
-                        content = blk.get(blk_type, {}) if blk_type else {}
-
-                        # Optional: strip out rich_text for easier saving
-                        if isinstance(content, dict) and "rich_text" in content:
-                            content["rich_text"] = [
-                                rt.get("plain_text", "") for rt in content["rich_text"]
-                            ]
-
-                        normalized_blocks.append({
-                            "id": blk.get("id"),
-                            "type": blk_type,
-                            "content": content
-                        })
+                    normalized_blocks = normalize_blocks(page_blocks)
 
-                    pages_meta[page_id] = {
+                    record = {
                         "id": page_id,
                         "title": title,
                         "parent_id": parent_id,
                         "blocks": normalized_blocks
                     }
+                    journal.append(record)
+                    if pages_meta is not None:
+                        pages_meta[page_id] = record
 
                     # Recurse into this child page
-                    self.get_pages_hierarchy(page_id, pages_meta)
+                    self._walk_pages_hierarchy(page_id, journal, pages_meta)
 
             if not response.get("has_more"):
                 break
             cursor = response.get("next_cursor")
 
-        # Save to disk safely
-        meta_file = os.path.join(output_dir, "metadata.json")
-        with open(meta_file, "w", encoding="utf-8") as f:
-            json.dump(pages_meta, f, indent=2, ensure_ascii=False)
 
-        return pages_meta
+    def get_pages_hierarchy_concurrent(self, parent_id: str, folder_name: str = "AI-assistant", max_workers: int = 8, requests_per_second: float = 3.0) -> PageJournal:
+        """
+        Concurrent version of get_pages_hierarchy: pages are fetched by a bounded
+        worker pool behind a shared rate limiter (see NotionCrawler).
+
+        :param parent_id: The Notion page ID of the parent folder.
+        :param max_workers: Number of pages fetched in parallel.
+        :param requests_per_second: Request rate shared by all workers.
+        :return: Same pages_meta structure and order as get_pages_hierarchy.
+        """
+        base_dir = getattr(self, "output_dir", "data")
+        output_dir = os.path.join(base_dir, folder_name)
+
+        crawler = NotionCrawler(self.notion, max_workers=max_workers, requests_per_second=requests_per_second)
+        journal = PageJournal(output_dir).open()
+        order = None
+        try:
+            order = crawler.crawl(parent_id, on_page=journal.append)
+        finally:
+            journal.close(order=order)
+
+        return journal
+
+
+    def get_pages_index(self) -> dict:
+        """
+        Returns {page_id without dashes: {"last_edited_time", "title"}} for every page
+        the integration can see, using the paginated search endpoint (100 pages per request).
+        """
+        index = {}
+        cursor = None
+        while True:
+            kwargs = {"filter": {"property": "object", "value": "page"}, "page_size": 100}
+            if cursor:
+                kwargs["start_cursor"] = cursor
+            response = self.notion.search(**kwargs)
+            for page in response.get("results", []):
+                title = None
+                for prop in page.get("properties", {}).values():
+                    if prop.get("type") == "title":
+                        title = "".join(t.get("plain_text", "") for t in prop.get("title", []))
+                index[page["id"].replace("-", "")] = {
+                    "last_edited_time": page.get("last_edited_time"),
+                    "title": title
+                }
+            if not response.get("has_more"):
+                break
+            cursor = response.get("next_cursor")
+        return index
+
 
+    def sync_pages_hierarchy(self, parent_id: str, folder_name: str = "AI-assistant", max_workers: int = 1, requests_per_second: float = 3.0):
+        """
+        Incremental version of get_pages_hierarchy backed by a local block cache.
 
-    def get_all_pages_in_hierarchy_grouped(self, data_by_page_id: dict, folder_name: str = "AI-assistant"):
+        Block children are only re-fetched for pages whose last_edited_time moved
+        since the previous sync (or that are new); every other page is served from
+        <output_dir>/<folder_name>/block_cache.
+
+        :param parent_id: The Notion page ID of the parent folder.
+        :param max_workers: Number of pages fetched in parallel.
+        :return: (pages_meta, changed_page_ids). pages_meta is a PageJournal like
+                 get_pages_hierarchy returns; changed_page_ids holds the pages whose
+                 blocks or heading path (own or ancestor title, parent) changed.
+        """
+        base_dir = getattr(self, "output_dir", "data")
+        output_dir = os.path.join(base_dir, folder_name)
+        os.makedirs(output_dir, exist_ok=True)
+
+        cache = NotionBlockCache(os.path.join(output_dir, "block_cache"))
+        pages_index = self.get_pages_index()
+
+        def last_edited(page_id):
+            return pages_index.get(page_id.replace("-", ""), {}).get("last_edited_time")
+
+        journal = PageJournal(output_dir).open()
+        paths = {parent_id: []}
+        changed = set()
+
+        def on_page(page):
+            # Renaming a page does not touch its parent's timestamp, so the title in a
+            # cached parent listing can be stale; search always has the current one
+            title = pages_index.get(page["id"].replace("-", ""), {}).get("title")
+            if title:
+                page["title"] = title
+
+            # A page also changes when its title, an ancestor's title or its parent does,
+            # since the heading path is part of every chunk. Parents always arrive first.
+            path = paths.get(page["parent_id"], []) + [page["title"]]
+            paths[page["id"]] = path
+            if page["id"] in crawler.fetched or path != cache.get_path(page["id"]):
+                changed.add(page["id"])
+            journal.append(page)
+
+        crawler = NotionCrawler(self.notion, max_workers=max_workers, requests_per_second=requests_per_second)
+        order = None
+        try:
+            order = crawler.crawl(
+                parent_id,
+                on_page=on_page,
+                cached_blocks=lambda page_id: cache.get_blocks(page_id, last_edited(page_id)),
+                on_fetch=lambda page_id, blocks: cache.put(page_id, blocks, last_edited(page_id))
+            )
+        finally:
+            journal.close(order=order)
+
+        for page_id, path in paths.items():
+            cache.set_path(page_id, path)
+        cache.prune(keep=set(paths))
+        cache.save()
+
+        print(f"🔄 Notion sync: {len(crawler.fetched)} pages fetched, {len(changed)} changed, {len(journal)} total.")
+        return journal, changed
+
+
+    def get_all_pages_in_hierarchy_grouped(self, data_by_page_id: dict, folder_name: str = "AI-assistant", page_ids: set = None):
+        """
+        Groups each page's blocks into paragraphs under their h1/h2/h3 headings.
+
+        :param data_by_page_id: pages_meta as returned by get_pages_hierarchy.
+        :param page_ids: Optional subset of pages to group (e.g. the pages changed
+                         since the last sync). The whole hierarchy is still used to
+                         build heading paths. chunks.json is only written for a full run.
+        """
         all_paragraphs = []
 
+        parent_paths = {}
+        # A PageJournal resolves titles and parents from its index instead of reading
+        # every ancestor's full record back from disk
+        get_meta = getattr(data_by_page_id, "meta", data_by_page_id.get)
+
         def get_parent_path(page_id):
+            # Memoized: every page under the same parent shares the same path
+            if page_id in parent_paths:
+                return parent_paths[page_id]
+            start_id = page_id
             path = []
             visited = set()
             while page_id and page_id not in visited:
                 visited.add(page_id)
-                page = data_by_page_id.get(page_id)
+                page = get_meta(page_id)
                 if not page:
                     break
                 title = page.get("title", "").strip()
                 if title:
                     path.append(title)
                 page_id = page.get("parent_id")
-            return list(reversed(path))
+            parent_paths[start_id] = list(reversed(path))
+            return parent_paths[start_id]
 
-        for page_id, page in data_by_page_id.items():
+        for page_id in data_by_page_id:
+            if page_ids is not None and page_id not in page_ids:
+                continue
+            page = data_by_page_id[page_id]
             page_name = page.get("title", "")
             blocks = page.get("blocks", [])
 
@@ -421,6 +550,9 @@ class NotionManager:
 
             flush_group()
 
+        if page_ids is not None:
+            return all_paragraphs
+
         # ✅ Save result
         base_dir = getattr(self, "output_dir", "data")
         output_dir = os.path.join(base_dir, folder_name)
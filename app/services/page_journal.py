@@ -0,0 +1,95 @@
+import os
+import json
+import threading
+from collections.abc import Mapping
+
+
+class PageJournal(Mapping):
+    """
+    Append-only store for crawled Notion pages.
+
+    Each page record is written to <name>.jsonl as soon as it is discovered, and a
+    small index (page_id -> title, parent_id, byte offset) is written once to
+    <name>_index.json when the crawl closes. Crawl I/O grows linearly with the number
+    of pages and records are only read back from disk when accessed, so memory stays
+    flat on big workspaces.
+
+    Behaves like the pages_meta dict (page_id -> {"id", "title", "parent_id", "blocks"}),
+    iterating in index order.
+    """
+
+    def __init__(self, output_dir: str, name: str = "metadata"):
+        self.records_path = os.path.join(output_dir, f"{name}.jsonl")
+        self.index_path = os.path.join(output_dir, f"{name}_index.json")
+        self.index = {}
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def open(self) -> "PageJournal":
+        """Starts a new crawl, truncating any previous journal."""
+        os.makedirs(os.path.dirname(self.records_path), exist_ok=True)
+        self.index = {}
+        self._writer = open(self.records_path, "wb")
+        return self
+
+    def append(self, record: dict):
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            offset = self._writer.tell()
+            self._writer.write(line)
+            self.index[record["id"]] = {
+                "title": record.get("title"),
+                "parent_id": record.get("parent_id"),
+                "offset": offset
+            }
+
+    def close(self, order: list[str] = None):
+        """
+        Finishes the crawl and writes the index once.
+
+        :param order: Optional page order for the index (e.g. depth-first order when
+                      records were appended in completion order).
+        """
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            if order is not None:
+                self.index = {page_id: self.index[page_id] for page_id in order if page_id in self.index}
+
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.index, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+
+    @classmethod
+    def load(cls, output_dir: str, name: str = "metadata") -> "PageJournal":
+        journal = cls(output_dir, name)
+        with open(journal.index_path, "r", encoding="utf-8") as f:
+            journal.index = json.load(f)
+        return journal
+
+    def meta(self, page_id: str) -> dict:
+        """
+        Returns {"id", "title", "parent_id"} for page_id from the index alone, without
+        reading its record, or None if the page is unknown. Used to walk ancestors.
+        """
+        entry = self.index.get(page_id)
+        if entry is None:
+            return None
+        return {"id": page_id, "title": entry["title"], "parent_id": entry["parent_id"]}
+
+    def __getitem__(self, page_id: str) -> dict:
+        entry = self.index[page_id]
+        with open(self.records_path, "rb") as f:
+            f.seek(entry["offset"])
+            return json.loads(f.readline())
+
+    def __contains__(self, page_id) -> bool:
+        return page_id in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
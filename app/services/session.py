@@ -1,8 +1,9 @@
 from app.memory.session_manager import SessionManager
 from app.services.summary_pipeline import SummaryPipeline
 from app.services.notion_manager import NotionManager
-import os, json, datetime
+import os, json, datetime, time
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 
 class SessionService:
@@ -18,13 +19,108 @@ class SessionService:
 
     def add_summary(self, session_id: str, summary_text: str):
         
-        manager = self.sessions[session_id]
-        established_summary = manager.notion.get_notion_page()
-        first_time = established_summary == ""
-        updated_data = self.summary_service.run_with_descriptor(raw_notes=summary_text, session_manager=manager, push_to_notion=True, first_time=first_time, old_descriptor=manager.descriptor, established_summary=established_summary)
+        updated_data = self._run_summary(session_id, summary_text)
+        timings = ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in updated_data["timings"].items())
+        print(f"⏱ Stage timings: {timings}")
         updated_descriptor = updated_data["new_descriptor"]
         return updated_descriptor
 
+    def _run_summary(self, session_id: str, summary_text: str) -> dict:
+        manager = self.sessions[session_id]
+        # The pipeline fetches the Notion page itself, overlapped with the first LLM call
+        return self.summary_service.run_with_descriptor(raw_notes=summary_text, session_manager=manager, push_to_notion=True, old_descriptor=manager.descriptor)
+
+    @staticmethod
+    def is_valid_session_id(session_id: str) -> bool:
+        """
+        True if session_id is a single path component, so it cannot point outside
+        the logs directory (e.g. "../x" or an absolute path from a manifest).
+        """
+        if not session_id or session_id in (".", ".."):
+            return False
+        if os.path.basename(session_id) != session_id:
+            return False
+        return not any(sep in session_id for sep in ("/", "\\", os.sep))
+
+    def load_session(self, session_id: str) -> bool:
+        """
+        Loads a single session from disk (instead of every session). Returns False if
+        it does not exist or session_id is not a valid session id.
+        """
+        if session_id in self.sessions:
+            return True
+        if not self.is_valid_session_id(session_id):
+            return False
+        sessions_dir = Path(__file__).resolve().parents[2] / "logs"
+        if not os.path.exists(os.path.join(sessions_dir, session_id, "metadata.json")):
+            return False
+        self.sessions[session_id] = SessionManager(session_id=session_id)
+        return True
+
+    def bulk_add_summaries(self, items: list, max_workers: int = 4, on_result=None) -> list:
+        """
+        Adds many note files to their sessions.
+
+        Different sessions are processed concurrently, but the files of one session
+        are added strictly in manifest order so its descriptor evolves as if they had
+        been added one by one. When an item fails, the remaining items of that session
+        are skipped rather than summarized against a stale descriptor.
+
+        Args:
+            items (list[dict]): Manifest entries {"session": id, "file": path}, in order.
+            max_workers (int): Sessions processed at the same time.
+            on_result (callable): Optional callback receiving each result as it completes.
+
+        Returns:
+            list[dict]: One result per item, in manifest order: index, session, file,
+                        status ("ok", "error" or "skipped"), seconds, timings, error.
+        """
+        results = [None] * len(items)
+        by_session = {}
+        for index, item in enumerate(items):
+            by_session.setdefault(item["session"], []).append(index)
+
+        def finish(index, **fields):
+            result = {
+                "index": index,
+                "session": items[index]["session"],
+                "file": items[index]["file"],
+                "status": "ok",
+                "seconds": 0.0,
+                "timings": {},
+                "error": None,
+                **fields
+            }
+            results[index] = result
+            if on_result:
+                on_result(result)
+
+        def process_session(session_id, indices):
+            if not self.load_session(session_id):
+                for index in indices:
+                    finish(index, status="error", error=f"Session '{session_id}' not found.")
+                return
+
+            for position, index in enumerate(indices):
+                started = time.perf_counter()
+                try:
+                    with open(items[index]["file"], "r") as f:
+                        summary_text = f.read()
+                    updated_data = self._run_summary(session_id, summary_text)
+                except Exception as e:
+                    finish(index, status="error", seconds=round(time.perf_counter() - started, 3), error=str(e))
+                    for skipped in indices[position + 1:]:
+                        finish(skipped, status="skipped", error=f"Earlier item {index} of this session failed.")
+                    return
+                finish(index, seconds=round(time.perf_counter() - started, 3), timings=updated_data["timings"])
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(process_session, session_id, indices) for session_id, indices in by_session.items()]
+            for future in futures:
+                future.result()
+
+        return results
+
     def get_descriptor(self, session_id: str):
         """
         Returns the latest descriptor content (not chat history).
@@ -7,6 +7,11 @@ from app.services.notion_manager import NotionManager
 from app.utils.descriptor import Descriptor
 from app.memory.session_manager import SessionManager
 from app.utils.markdown_parser import parse_between_delimiters
+from app.utils.task_graph import TaskGraph
+import time
+
+# get_notion_page() returns this for a page without content blocks
+NO_CONTENT = "(No content found)"
 
 class SummaryPipeline:
     def __init__(self):
@@ -18,11 +23,11 @@ class SummaryPipeline:
     def run_with_descriptor(
         self,
         raw_notes: str,
-        established_summary: str,
         old_descriptor: Descriptor,
         session_manager: SessionManager,
+        established_summary: str = None,
         push_to_notion: bool = False,
-        first_time: bool = False,
+        first_time: bool = None,
     ) -> dict:
         """
         NEW ARCHITECTURE: Full summarization workflow using descriptor-based context.
@@ -34,75 +39,122 @@ class SummaryPipeline:
         3. Critique and regenerate final summary.
         4. Generate updated descriptor from old_descriptor + headings of established summary
 
+        The steps run as a TaskGraph: fetching the Notion page overlaps with the initial
+        summary, and the descriptor update overlaps with the Notion push. Nothing is
+        saved until every step (including the push) has succeeded, so a failed run
+        leaves the chat history and descriptor on disk as they were and can be retried.
+
         Args:
             raw_notes (str): The new raw notes to be summarized.
             old_descriptor (Descriptor): Current descriptor string representing the established summary.
+            established_summary (str, optional): Markdown of the Notion page; fetched
+                                                 concurrently with the initial summary when None.
             push_to_notion (bool, optional): Whether to push final summary to Notion.
+            first_time (bool, optional): Whether the page has no summary yet; derived
+                                         from the page when None.
 
         Returns:
-            dict: Contains initial_summary, critique, final_summary_markdown, new_descriptor.
+            dict: Contains initial_summary, critique, final_summary_markdown, new_descriptor,
+                  and timings (seconds per stage, plus total).
         """
+        started = time.perf_counter()
+        graph = TaskGraph()
 
-     # Clear separation of state
-        initial_summary = ""
-        critique = ""
-        final_summary_markdown = ""
-        new_descriptor = ""
-
-        if not first_time:
-            # 1. Generate initial summary
-            initial_summary = self.generation_chain.summarize(raw_notes)
-            headings = self.chunker.chunk_by_heading(established_summary)
-            
-            # Save to chat history
-            session_manager.chat_history.add_turn(raw_notes, initial_summary,role_1="user", role_2="generation_chain")
-
+        if established_summary is None:
+            graph.add("fetch_page", session_manager.notion.get_notion_page)
+        else:
+            graph.add("fetch_page", lambda: established_summary)
+
+        def is_first_time(page: str) -> bool:
+            if first_time is not None:
+                return first_time
+            return page.strip() in ("", NO_CONTENT)
+
+        # The prompt depends on whether the page is empty, but waiting for the page
+        # would serialize the two slowest steps. Guess from the descriptor (empty on a
+        # new session) and redo the draft in the rare case the guess was wrong.
+        predicted_first_time = first_time if first_time is not None else not old_descriptor.content.strip()
+
+        def draft():
+            prompt_type = "generation_init" if predicted_first_time else "generation"
+            return self.generation_chain.summarize(raw_notes, prompt_type=prompt_type)
+
+        def initial(fetch_page, draft):
+            if is_first_time(fetch_page) == predicted_first_time:
+                return draft
+            print("🔁 Notion page state differs from the descriptor, regenerating the initial summary...")
+            prompt_type = "generation_init" if is_first_time(fetch_page) else "generation"
+            return self.generation_chain.summarize(raw_notes, prompt_type=prompt_type)
+
+        def critique(fetch_page, initial_summary):
+            if is_first_time(fetch_page):
+                return ""
+            headings = self.chunker.chunk_by_heading(fetch_page)
             heading_tree = HeadingTreeBuilder(headings).build_tree()
-
-            # 2. Critique using descriptor 
-            critique = self.reflection_chain.reflect(
+            # 2. Critique using descriptor
+            return self.reflection_chain.reflect(
                 initial_summary=initial_summary,
                 retrieved_context=old_descriptor.content,
                 heading_tree=heading_tree
             )
-            session_manager.chat_history.add_turn(initial_summary, critique, role_1="generation_chain", role_2="reflection_chain")
 
+        def final_summary(fetch_page, initial_summary, critique):
+            if is_first_time(fetch_page):
+                return initial_summary
             # 3. Regenerate final summary
-            final_summary_markdown = self.generation_chain.regenerate(
+            return self.generation_chain.regenerate(
                 initial_summary=initial_summary,
                 critique=critique
             )
-            session_manager.chat_history.add_turn(critique, final_summary_markdown, role_1="reflection_chain", role_2="generation_chain")
-
-            # 4. Update descriptor
-            new_descriptor = old_descriptor.update(final_summary=final_summary_markdown)
 
+        def descriptor(final_summary):
+            # 4. Update descriptor (saved with the chat history once the push succeeded)
+            return old_descriptor.generate(final_summary=final_summary)
+
+        def push(final_summary):
+            # 5. Push to Notion (optional)
+            if not push_to_notion:
+                return final_summary
+            # generation_init output has no <<FINAL_SUMMARY>> delimiters
+            pushed = parse_between_delimiters(final_summary) or final_summary
+            session_manager.notion.write_to_notion(pushed)
+            return pushed
+
+        graph.add("draft", draft)
+        graph.add("initial_summary", initial, deps=["fetch_page", "draft"])
+        graph.add("critique", critique, deps=["fetch_page", "initial_summary"])
+        graph.add("final_summary", final_summary, deps=["fetch_page", "initial_summary", "critique"])
+        graph.add("descriptor", descriptor, deps=["final_summary"])
+        graph.add("push", push, deps=["final_summary"])
+        results = graph.run()
+
+        first = is_first_time(results["fetch_page"])
+        final_summary_markdown = results["final_summary"]
+        new_descriptor = results["descriptor"]
+
+        # Chat history keeps the original turn order regardless of completion order
+        if not first:
+            initial_summary, critique_text = results["initial_summary"], results["critique"]
+            session_manager.chat_history.add_turn(raw_notes, initial_summary, role_1="user", role_2="generation_chain")
+            session_manager.chat_history.add_turn(initial_summary, critique_text, role_1="generation_chain", role_2="reflection_chain")
+            session_manager.chat_history.add_turn(critique_text, final_summary_markdown, role_1="reflection_chain", role_2="generation_chain")
         else:
-            # First time generation
-            final_summary_markdown = self.generation_chain.summarize(
-                raw_notes, prompt_type="generation_init"
-            )
-            headings = self.chunker.chunk_by_heading(final_summary_markdown)
-            heading_tree = HeadingTreeBuilder(headings).build_tree()
-
-            session_manager.chat_history.add_turn(raw_notes, final_summary_markdown,role_1="user", role_2="generation_chain")
-
-            new_descriptor = old_descriptor.update(final_summary=final_summary_markdown)
+            initial_summary, critique_text = "", ""
+            session_manager.chat_history.add_turn(raw_notes, final_summary_markdown, role_1="user", role_2="generation_chain")
 
         session_manager.chat_history.add_turn(final_summary_markdown, new_descriptor,role_1="generation_chain", role_2="generation_chain")
-        
 
-        # Save chat history to disk
+        # Save chat history and descriptor to disk, together
         session_manager.save()
+        old_descriptor.replace(new_descriptor)
 
-        # 5. Push to Notion (optional)
-        if push_to_notion:
-            final_summary_markdown = parse_between_delimiters(final_summary_markdown)
-            session_manager.notion.write_to_notion(final_summary_markdown)
+        timings = {stage: round(seconds, 3) for stage, seconds in graph.timings.items()}
+        timings["total"] = round(time.perf_counter() - started, 3)
 
         return {
             "initial_summary": initial_summary,
-            "critique": critique,
-            "final_summary_markdown": final_summary_markdown,
-            "new_descriptor": new_descriptor
-        }
\ No newline at end of file
+            "critique": critique_text,
+            "final_summary_markdown": results["push"],
+            "new_descriptor": new_descriptor,
+            "timings": timings
+        }
@@ -1,4 +1,5 @@
 import os
+import shutil
 import subprocess
 import torch
 import numpy as np
@@ -8,22 +9,46 @@ from langchain_experimental.text_splitter import SemanticChunker
 from langchain.schema.embeddings import Embeddings
 from app.chains.generation_chain import GenerationChain
 from app.utils.markdown_parser import parse_between_delimiters
+from app.services.video_store import VideoEmbeddingStore, file_signature, normalize
+from app.services.video_media import (
+    VideoIngestError, local_path, download_media, extract_audio,
+    detect_silences, plan_segments, split_audio, merge_transcriptions, select_keyframes
+)
+from app.utils.image_hash import dhash, hamming
+from app.utils.task_graph import TaskGraph
+from app.utils.rate_limiter import GroqRequestError, parse_duration
 import glob
 import requests
 import subprocess
 import webbrowser
 import re
 import ast
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 
 from dotenv import load_dotenv
 load_dotenv()
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")  
+# Point at a local stand-in (study_assistant llm serve) to test without the API
+GROQ_TRANSCRIPTION_URL = os.getenv("GROQ_TRANSCRIPTION_URL", "https://api.groq.com/openai/v1/audio/transcriptions")
+TRANSCRIBE_CONCURRENCY = int(os.getenv("GROQ_TRANSCRIBE_CONCURRENCY", "4"))
 
 
 class VideoQA:
-    def __init__(self, transcript_path, frames_dir, audio_path, video_path, screenshot_dir, interval=5, k_text=10, k_images=3):
+    IMAGE_BATCH_SIZE = 32
+    DECODE_WORKERS = 4
+    FRAMES_INDEX = "frames_index.json"
+    # Transcription uploads: segments of at most SEGMENT_SECONDS, cut in silences
+    SEGMENT_SECONDS = 600
+    SILENCE_NOISE = "-35dB"
+    SILENCE_SECONDS = 0.4
+    TRANSCRIBE_RETRIES = 3
+
+    def __init__(self, transcript_path, frames_dir, audio_path, video_path, screenshot_dir, interval=5, k_text=10, k_images=3,
+                 keyframes=False, scene_threshold=0.3, hash_distance=6, transcription_url=None, transcribe_concurrency=None):
         self.TRANSCRIPT_PATH = transcript_path
         self.FRAMES_DIR = frames_dir
         self.AUDIO_PATH = audio_path
@@ -32,51 +57,78 @@ class VideoQA:
         self.INTERVAL = interval
         self.K_TEXT = k_text
         self.K_IMAGES = k_images
+        # Keyframe mode: one frame per scene change instead of one every INTERVAL seconds
+        self.KEYFRAMES = keyframes
+        self.SCENE_THRESHOLD = scene_threshold
+        self.HASH_DISTANCE = hash_distance
+        self.TRANSCRIPTION_URL = transcription_url or GROQ_TRANSCRIPTION_URL
+        self.TRANSCRIBE_CONCURRENCY = transcribe_concurrency or TRANSCRIBE_CONCURRENCY
 
         # CLIP model
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32").to(self.device)
         self.processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
 
+        # Chunks and embeddings are cached next to the transcript
+        self.store = VideoEmbeddingStore(os.path.dirname(os.path.abspath(self.TRANSCRIPT_PATH)))
+
     # --- DOWNLOAD ---
-    def download_audio(self, url):
-        print("📥 Downloading audio...")
-        cmd = [
-            "yt-dlp",
-            "-f", "bestaudio",
-            "--extract-audio",
-            "--audio-format", "mp3",
-            "--output", self.AUDIO_PATH,
-            url
-        ]
-        subprocess.run(cmd, check=True)
-    
-    def transcribe_audio_groq(self, audio_path):
-        print("🧠 Transcribing via Groq API (with timestamps)...")
+    def download_media(self, url):
+        """Fetches the video once into VIDEO_PATH (see video_media.download_media)."""
+        return download_media(url, self.VIDEO_PATH)
 
-        url = "https://api.groq.com/openai/v1/audio/transcriptions"
+    def extract_audio(self):
+        """Extracts the audio track of VIDEO_PATH to AUDIO_PATH as 16 kHz mono Opus."""
+        return extract_audio(self.VIDEO_PATH, self.AUDIO_PATH)
 
+    def transcribe_file(self, path):
+        """Uploads one audio file; retries 429 and 5xx answers, honouring retry-after."""
         headers = {
             "Authorization": f"Bearer {GROQ_API_KEY}"
         }
+        data = {
+            "model": "whisper-large-v3",
+            "response_format": "verbose_json"  # 👈 tells it to include timestamps
+        }
+        for attempt in range(self.TRANSCRIBE_RETRIES + 1):
+            with open(path, "rb") as audio_file:
+                files = {"file": (os.path.basename(path), audio_file)}
+                response = requests.post(self.TRANSCRIPTION_URL, files=files, data=data, headers=headers)
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt < self.TRANSCRIBE_RETRIES:
+                    delay = parse_duration(response.headers.get("retry-after"))
+                    time.sleep(delay if delay is not None else min(2 ** attempt, 30))
+                    continue
+            if response.status_code >= 400:
+                raise GroqRequestError(f"Transcription of {os.path.basename(path)} failed ({response.status_code}): {response.text[:200]}")
+            return response.json()
+
+    def transcribe_audio_groq(self, audio_path):
+        """
+        Transcribes audio_path with timestamps. Long audio is split at silences into
+        segments of at most SEGMENT_SECONDS, which are transcribed concurrently (at most
+        TRANSCRIBE_CONCURRENCY at a time) and merged back into one verbose_json.
+        """
+        print("🧠 Transcribing via Groq API (with timestamps)...")
 
-        with open(audio_path, 'rb') as audio_file:
-            files = {"file": audio_file}
-            data = {
-                "model": "whisper-large-v3",
-                "response_format": "verbose_json"  # 👈 tells it to include timestamps
-            }
+        duration, silences = detect_silences(audio_path, noise=self.SILENCE_NOISE, min_silence=self.SILENCE_SECONDS)
+        segments = plan_segments(duration, silences, self.SEGMENT_SECONDS)
+        paths = split_audio(audio_path, segments) if len(segments) > 1 else [audio_path]
+        print(f"✂️ {len(paths)} segment(s) for {duration / 60:.1f} min of audio")
 
-            response = requests.post(url, files=files, data=data, headers=headers)
-            response.raise_for_status()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.TRANSCRIBE_CONCURRENCY) as pool:
+            results = list(pool.map(self.transcribe_file, paths))
+        print(f"⏱ Transcribed in {time.perf_counter() - started:.1f}s")
+        result = merge_transcriptions(results, segments)
 
-            result = response.json()
+        if len(paths) > 1:
+            shutil.rmtree(os.path.dirname(paths[0]), ignore_errors=True)
 
         # Save raw JSON for later processing
         output_path = self.TRANSCRIPT_PATH
         json_path = output_path.replace(".txt", ".json")
         with open(json_path, "w", encoding="utf-8") as f:
-            import json
             json.dump(result, f, ensure_ascii=False, indent=2)
 
         # Save plain text with timestamps
@@ -90,23 +142,14 @@ class VideoQA:
         print(f"✅ Transcript with timestamps saved to {output_path}")
         print(f"📂 Full JSON saved to {json_path}")
 
-    def download_video_and_screenshots(self, url):
-        print("📥 Downloading video...")
-        cmd = [
-            "yt-dlp",
-            "-f", "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best",
-            "--merge-output-format", "mp4",
-            "--output", self.VIDEO_PATH,
-            url
-        ]
-        try:
-            subprocess.run(cmd, check=True)
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Failed to download video: {e}")
-            return False
-
-        self.capture_screenshots()
-        return True
+    def capture_frames(self):
+        # The frames index has to describe every frame in the folder, so frames left
+        # by an earlier run (possibly in the other mode) are removed first
+        for old in glob.glob(os.path.join(self.SCREENSHOT_DIR, "*.png")):
+            os.remove(old)
+        captured = self.capture_keyframes() if self.KEYFRAMES else self.capture_screenshots()
+        if captured is False:
+            raise VideoIngestError("Failed to capture frames.")
 
     def capture_screenshots(self):
         print(f"📸 Capturing screenshots every {self.INTERVAL} seconds...")
@@ -127,13 +170,69 @@ class VideoQA:
             return False
 
         temp_files = sorted(glob.glob(os.path.join(self.SCREENSHOT_DIR, "temp_*.png")))
+        index = []
         for i, temp_file in enumerate(temp_files):
             timestamp = i * self.INTERVAL
             new_name = os.path.join(self.SCREENSHOT_DIR, f"frame_{timestamp}.png")
             os.rename(temp_file, new_name)
+            index.append({"file": os.path.basename(new_name), "time": float(timestamp)})
+        self.write_frames_index("interval", index)
 
         print("🎯 Done! Screenshots saved in:", self.SCREENSHOT_DIR)
 
+    def capture_keyframes(self):
+        """
+        Extracts one frame per visual change: ffmpeg keeps the first frame and every
+        frame whose scene-change score exceeds SCENE_THRESHOLD, then frames whose
+        perceptual hash is within HASH_DISTANCE bits of the previously kept frame are
+        dropped (slide builds, cursor moves, compression noise). The presentation
+        time of each kept frame is read from ffmpeg's showinfo output and written to
+        the frames index.
+        """
+        print(f"🎞️ Extracting keyframes (scene threshold {self.SCENE_THRESHOLD})...")
+        os.makedirs(self.SCREENSHOT_DIR, exist_ok=True)
+
+        drawtext_filter = "drawtext=text='%{pts\\:hms}':fontsize=20:fontcolor=white:x=10:y=10"
+        ffmpeg_cmd = [
+            "ffmpeg",
+            "-i", self.VIDEO_PATH,
+            "-vf", f"select='eq(n,0)+gt(scene,{self.SCENE_THRESHOLD})',showinfo,{drawtext_filter}",
+            "-vsync", "vfr",
+            os.path.join(self.SCREENSHOT_DIR, "temp_%05d.png")
+        ]
+        try:
+            result = subprocess.run(ffmpeg_cmd, check=True, stderr=subprocess.PIPE, text=True)
+        except subprocess.CalledProcessError as e:
+            print(f"❌ Failed to extract keyframes: {e}")
+            return False
+
+        temp_files = sorted(glob.glob(os.path.join(self.SCREENSHOT_DIR, "temp_*.png")))
+        kept = select_keyframes(temp_files, result.stderr, self.HASH_DISTANCE, hash_fn=dhash, distance_fn=hamming)
+        kept_sources = {frame["source"] for frame in kept}
+        for temp_file in temp_files:
+            if temp_file not in kept_sources:
+                os.remove(temp_file)
+        index = []
+        for frame in kept:
+            os.rename(frame["source"], os.path.join(self.SCREENSHOT_DIR, frame["file"]))
+            index.append({"file": frame["file"], "time": frame["time"]})
+        self.write_frames_index("keyframes", index)
+
+        print(f"🎯 Kept {len(index)} of {len(temp_files)} scene-change frames in: {self.SCREENSHOT_DIR}")
+        return True
+
+    def write_frames_index(self, mode, frames):
+        with open(os.path.join(self.SCREENSHOT_DIR, self.FRAMES_INDEX), "w", encoding="utf-8") as f:
+            json.dump({"mode": mode, "frames": frames}, f, ensure_ascii=False, indent=2)
+
+    def load_frame_times(self):
+        """Frame file name -> timestamp in seconds, from the frames index (empty if missing)."""
+        index_path = os.path.join(self.FRAMES_DIR, self.FRAMES_INDEX)
+        if not os.path.exists(index_path):
+            return {}
+        with open(index_path, "r", encoding="utf-8") as f:
+            return {frame["file"]: frame["time"] for frame in json.load(f).get("frames", [])}
+
     # --- EMBEDDINGS ---
     class CLIPTextEmbeddings(Embeddings):
         def __init__(self, processor, model, device):
@@ -164,24 +263,114 @@ class VideoQA:
             embeddings = self.model.get_text_features(**inputs)
         return embeddings.cpu().numpy()
 
-    def embed_images(self, image_paths):
-        images = [Image.open(p).convert("RGB") for p in image_paths]
-        inputs = self.processor(images=images, return_tensors="pt", padding=True).to(self.device)
-        with torch.no_grad():
-            embeddings = self.model.get_image_features(**inputs)
-        return embeddings.cpu().numpy()
+    @staticmethod
+    def _decode_image(path):
+        with Image.open(path) as image:
+            return image.convert("RGB")
+
+    def iter_image_embeddings(self, image_paths, batch_size=None):
+        """
+        Embeds frames in fixed-size batches, yielding (start_index, embeddings) per batch.
+
+        Frames are decoded on a thread pool, and the next batch is decoded while CLIP
+        encodes the current one, so at most two batches of images are in memory
+        whatever the length of the video.
+        """
+        batch_size = batch_size or self.IMAGE_BATCH_SIZE
+        batches = [image_paths[i:i + batch_size] for i in range(0, len(image_paths), batch_size)]
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.DECODE_WORKERS) as pool:
+            pending = [pool.submit(self._decode_image, p) for p in batches[0]] if batches else []
+            for index in range(len(batches)):
+                images = [future.result() for future in pending]
+                if index + 1 < len(batches):
+                    pending = [pool.submit(self._decode_image, p) for p in batches[index + 1]]
+
+                inputs = self.processor(images=images, return_tensors="pt", padding=True).to(self.device)
+                with torch.no_grad():
+                    embeddings = self.model.get_image_features(**inputs)
+                del images, inputs
+                yield index * batch_size, embeddings.cpu().numpy()
+
+                done = min((index + 1) * batch_size, len(image_paths))
+                rate = done / max(time.perf_counter() - started, 1e-9)
+                print(f"\r🖼️ Embedded {done}/{len(image_paths)} frames ({rate:.1f} frames/s)", end="", flush=True)
+
+        if batches:
+            print()
+
+    def embed_images(self, image_paths, batch_size=None):
+        embeddings = np.empty((len(image_paths), self.model.config.projection_dim), dtype=np.float32)
+        for start, batch in self.iter_image_embeddings(image_paths, batch_size):
+            embeddings[start:start + len(batch)] = batch
+        return embeddings
 
     def cosine_similarity(self, a, b):
         a = a / np.linalg.norm(a, axis=1, keepdims=True)
         b = b / np.linalg.norm(b, axis=1, keepdims=True)
         return np.dot(a, b.T)
 
-    def build_context_with_frames(self, transcript_chunks, text_scores, frame_files, image_scores, best_text_indices, best_image_indices):
+    def list_frames(self):
+        return sorted([
+            os.path.join(self.FRAMES_DIR, f)
+            for f in os.listdir(self.FRAMES_DIR)
+            if f.lower().endswith((".png", ".jpg", ".jpeg"))
+        ])
+
+    def load_text_index(self):
+        """
+        Returns (transcript_chunks, normalized embeddings), chunking and embedding the
+        transcript only when it changed since the cached copy was written.
+        """
+        signature = file_signature([self.TRANSCRIPT_PATH])
+        cached = self.store.load_text(signature)
+        if cached is not None:
+            print(f"♻️ Using cached transcript embeddings ({len(cached[0])} chunks)")
+            return cached
+
+        with open(self.TRANSCRIPT_PATH, "r") as f:
+            transcript = f.read().strip()
+        transcript_chunks = self.semantic_chunk_text(transcript)
+        embeddings = self.store.save_text(signature, transcript_chunks, self.embed_text(transcript_chunks))
+        return transcript_chunks, embeddings
+
+    def load_frame_index(self):
+        """
+        Returns (frame_files, normalized embeddings), embedding the frames only when the
+        set of frame files changed since the cached copy was written.
+        """
+        frame_files = self.list_frames()
+        signature = file_signature(frame_files)
+        cached = self.store.load_frames(signature)
+        if cached is not None:
+            print(f"♻️ Using cached frame embeddings ({len(frame_files)} frames)")
+            return [os.path.join(self.FRAMES_DIR, name) for name in cached[0]], cached[1]
+
+        names = [os.path.basename(path) for path in frame_files]
+        # Batches go straight to the memory-mapped store instead of a full in-memory matrix
+        embeddings = self.store.save_frames(signature, names, self.iter_image_embeddings(frame_files))
+        return frame_files, embeddings
+
+    @staticmethod
+    def format_seconds(seconds):
+        hrs = int(seconds // 3600)
+        mins = int((seconds % 3600) // 60)
+        secs = int(seconds % 60)
+        return f"{hrs:02}:{mins:02}:{secs:02}"
+
+    def build_context_with_frames(self, transcript_chunks, text_scores, frame_files, image_scores, best_text_indices, best_image_indices, frame_times=None):
         top_transcripts = [
             f"[Transcript] {transcript_chunks[idx]} (score: {text_scores[idx]:.4f})"
             for idx in best_text_indices
         ]
         top_images = [frame_files[idx] for idx in best_image_indices]
+        # Paths stay alone on their lines: the prompt asks for them to be copied verbatim
+        frame_times = frame_times or {}
+        time_lines = []
+        for path in top_images:
+            seconds = frame_times.get(os.path.basename(path))
+            time_lines.append(self.format_seconds(seconds) if seconds is not None else "N/A")
 
         best_timestamp = None
         if best_text_indices.size > 0:
@@ -189,56 +378,70 @@ class VideoQA:
             if first_chunk.startswith("[") and "]" in first_chunk:
                 ts_part = first_chunk.split("]")[0].strip("[")
                 start_ts = ts_part.split("-")[0].strip()
-                seconds = float(start_ts)
-                hrs = int(seconds // 3600)
-                mins = int((seconds % 3600) // 60)
-                secs = int(seconds % 60)
-                best_timestamp = f"{hrs:02}:{mins:02}:{secs:02}"
+                best_timestamp = self.format_seconds(float(start_ts))
 
         context = (
             "Top Relevant Transcripts:\n" + "\n".join(top_transcripts) + "\n\n"
             "Top Retrieved Frames:\n" + "\n".join(top_images) + "\n\n"
-            f"Best Timestamp: {best_timestamp if best_timestamp else 'N/A'}"
+            + ("Frame Times (same order as the frames above):\n" + "\n".join(time_lines) + "\n\n" if frame_times else "")
+            + f"Best Timestamp: {best_timestamp if best_timestamp else 'N/A'}"
         )
         return context, top_images, best_timestamp
 
     # --- MAIN PIPELINE ---
-    def run(self, url, query):
+    def ingest(self, url):
+        """
+        Downloads the video once, then runs the two independent branches concurrently:
+        audio extraction -> transcription -> transcript embedding, and frame capture ->
+        frame embedding. Per-stage timings are printed and returned.
+        """
+        graph = TaskGraph(max_workers=2)
+        graph.add("download", lambda: self.download_media(url))
+        graph.add("audio", lambda download: self.extract_audio(), deps=["download"])
+        graph.add("transcribe", lambda audio: self.transcribe_audio_groq(audio_path=audio), deps=["audio"])
+        graph.add("embed_text", lambda transcribe: self.load_text_index(), deps=["transcribe"])
+        graph.add("frames", lambda download: self.capture_frames(), deps=["download"])
+        graph.add("embed_frames", lambda frames: self.load_frame_index(), deps=["frames"])
+
+        started = time.perf_counter()
+        graph.run()
+        timings = dict(graph.timings)
+        timings["total"] = time.perf_counter() - started
+        print("⏱ Ingest timings: " + ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in timings.items()))
+        return timings
+
+    def run(self, url, query, stream=False):
         if not os.path.exists(self.TRANSCRIPT_PATH):
-            self.download_audio(url)
-            self.download_video_and_screenshots(url)
-            self.transcribe_audio_groq(audio_path=self.AUDIO_PATH)
-        
+            self.ingest(url)
 
-        with open(self.TRANSCRIPT_PATH, "r") as f:
-            transcript = f.read().strip()
-        transcript_chunks = self.semantic_chunk_text(transcript)
+        transcript_chunks, text_embeddings = self.load_text_index()
+        frame_files, image_embeddings = self.load_frame_index()
 
-        frame_files = sorted([
-            os.path.join(self.FRAMES_DIR, f)
-            for f in os.listdir(self.FRAMES_DIR)
-            if f.lower().endswith((".png", ".jpg", ".jpeg"))
-        ])
-
-        text_embeddings = self.embed_text(transcript_chunks)
-        image_embeddings = self.embed_images(frame_files)
-
-        query_embedding = self.embed_text([query])
-
-        text_scores = self.cosine_similarity(query_embedding, text_embeddings)[0]
-        image_scores = self.cosine_similarity(query_embedding, image_embeddings)[0]
+        # Stored embeddings are already unit length: one product per index scores the query
+        query_embedding = normalize(self.embed_text([query]))[0]
+        text_scores = text_embeddings @ query_embedding
+        image_scores = image_embeddings @ query_embedding if frame_files else np.zeros(0)
 
         best_text_indices = np.argsort(text_scores)[::-1][:self.K_TEXT]
         best_image_indices = np.argsort(image_scores)[::-1][:self.K_IMAGES]
 
         context, top_images, best_timestamp = self.build_context_with_frames(
-            transcript_chunks, text_scores, frame_files, image_scores, best_text_indices, best_image_indices
+            transcript_chunks, text_scores, frame_files, image_scores, best_text_indices, best_image_indices,
+            frame_times=self.load_frame_times()
         )
 
         generation = GenerationChain()
-        answer = generation.question_answering_video(question=query, context=context)
-
-        print("\n=== LLM Answer ===\n", answer)
+        if stream:
+            print("\n=== LLM Answer ===\n")
+            answer = generation.question_answering_video(
+                question=query,
+                context=context,
+                on_token=lambda token: print(token, end="", flush=True)
+            )
+            print()
+        else:
+            answer = generation.question_answering_video(question=query, context=context)
+            print("\n=== LLM Answer ===\n", answer)
         print("\nRetrieved Images:", top_images)
         print("Best Timestamp:", best_timestamp)
 
@@ -252,7 +455,9 @@ class VideoQA:
         
 
         match = re.search(r"<<([\d\.]+)\s*-\s*[\d\.]+>>", timestamp)
-        if match:
+        if match and local_path(url):
+            print(f"⏩ Best moment at {self.format_seconds(float(match.group(1)))} in {self.VIDEO_PATH}")
+        elif match:
             start_seconds = float(match.group(1))
             # Convert seconds to integer for YouTube t parameter
             start_seconds_int = int(start_seconds)
@@ -0,0 +1,187 @@
+import os
+import re
+import shutil
+import subprocess
+
+
+class VideoIngestError(RuntimeError):
+    """Downloading or processing the video failed."""
+
+
+def local_path(url):
+    """Path of a local media file given as a path or file:// URL, else None."""
+    path = url[len("file://"):] if url.startswith("file://") else url
+    return path if os.path.isfile(path) else None
+
+
+def download_media(url, video_path):
+    """
+    Fetches the video (with its audio track) once into video_path. Local files are
+    copied instead of downloaded; an existing video_path is reused.
+    """
+    if os.path.exists(video_path):
+        print(f"♻️ Using downloaded video: {video_path}")
+        return video_path
+
+    if local_path(url):
+        print("📥 Copying local video...")
+        shutil.copyfile(local_path(url), video_path)
+        return video_path
+
+    print("📥 Downloading video...")
+    cmd = [
+        "yt-dlp",
+        "-f", "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best",
+        "--merge-output-format", "mp4",
+        "--output", video_path,
+        url
+    ]
+    try:
+        subprocess.run(cmd, check=True)
+    except subprocess.CalledProcessError as e:
+        raise VideoIngestError(f"Failed to download video: {e}") from e
+    return video_path
+
+
+def audio_encoding_args():
+    # 16 kHz mono is what Whisper works on; Opus at 24 kb/s keeps an hour near 11 MB
+    return ["-vn", "-ac", "1", "-ar", "16000", "-codec:a", "libopus", "-b:a", "24k"]
+
+
+def extract_audio(video_path, audio_path):
+    """Extracts the audio track of video_path to audio_path as 16 kHz mono Opus."""
+    print("🎧 Extracting audio...")
+    ffmpeg_cmd = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-i", video_path,
+        *audio_encoding_args(),
+        audio_path
+    ]
+    try:
+        subprocess.run(ffmpeg_cmd, check=True)
+    except subprocess.CalledProcessError as e:
+        raise VideoIngestError(f"Failed to extract audio: {e}") from e
+    return audio_path
+
+
+def detect_silences(audio_path, noise="-35dB", min_silence=0.4):
+    """Returns (duration, [(silence_start, silence_end), ...]) from ffmpeg's silencedetect."""
+    ffmpeg_cmd = [
+        "ffmpeg", "-hide_banner", "-nostats",
+        "-i", audio_path,
+        "-af", f"silencedetect=noise={noise}:d={min_silence}",
+        "-f", "null", "-"
+    ]
+    try:
+        output = subprocess.run(ffmpeg_cmd, check=True, stderr=subprocess.PIPE, text=True).stderr
+    except subprocess.CalledProcessError as e:
+        raise VideoIngestError(f"Failed to analyse audio: {e}") from e
+
+    starts = [float(t) for t in re.findall(r"silence_start:\s*([\d.]+)", output)]
+    ends = [float(t) for t in re.findall(r"silence_end:\s*([\d.]+)", output)]
+    match = re.search(r"Duration:\s*(\d+):(\d+):([\d.]+)", output)
+    if match:
+        duration = int(match.group(1)) * 3600 + int(match.group(2)) * 60 + float(match.group(3))
+    else:
+        duration = max(ends + starts + [0.0])
+    # A trailing silence that runs to the end has no silence_end
+    ends += [duration] * (len(starts) - len(ends))
+    return duration, list(zip(starts, ends))
+
+
+def plan_segments(duration, silences, max_seconds):
+    """
+    Splits [0, duration] into segments of at most max_seconds, cutting in the middle
+    of the last silence of each window so no word is cut in half. Windows with no
+    silence past their first half are cut at max_seconds.
+    """
+    middles = [(start + end) / 2 for start, end in silences]
+    cuts = [0.0]
+    while duration - cuts[-1] > max_seconds:
+        start = cuts[-1]
+        window = [m for m in middles if start + max_seconds / 2 < m <= start + max_seconds]
+        cuts.append(window[-1] if window else start + max_seconds)
+    return list(zip(cuts, cuts[1:] + [duration]))
+
+
+def split_audio(audio_path, segments):
+    """Cuts audio_path into one file per (start, end) segment; returns their paths."""
+    segment_dir = os.path.join(os.path.dirname(os.path.abspath(audio_path)), "audio_segments")
+    os.makedirs(segment_dir, exist_ok=True)
+    paths = []
+    for i, (start, end) in enumerate(segments):
+        path = os.path.join(segment_dir, f"segment_{i:03d}.ogg")
+        ffmpeg_cmd = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}",
+            "-i", audio_path,
+            *audio_encoding_args(),
+            path
+        ]
+        try:
+            subprocess.run(ffmpeg_cmd, check=True)
+        except subprocess.CalledProcessError as e:
+            raise VideoIngestError(f"Failed to split audio: {e}") from e
+        paths.append(path)
+    return paths
+
+
+def merge_transcriptions(results, segments):
+    """
+    Merges per-segment verbose_json results into one, shifting segment (and word)
+    timestamps by the offset of the audio segment they came from.
+    """
+    merged_segments, merged_words, texts = [], [], []
+    for result, (offset, _) in zip(results, segments):
+        for seg in result.get("segments", []):
+            seg = dict(seg, id=len(merged_segments), start=seg["start"] + offset, end=seg["end"] + offset)
+            merged_segments.append(seg)
+        for word in result.get("words", []):
+            merged_words.append(dict(word, start=word["start"] + offset, end=word["end"] + offset))
+        if result.get("text", "").strip():
+            texts.append(result["text"].strip())
+
+    merged = {
+        "task": "transcribe",
+        "language": results[0].get("language") if results else None,
+        "duration": segments[-1][1] if segments else 0.0,
+        "text": " ".join(texts),
+        "segments": merged_segments
+    }
+    if merged_words:
+        merged["words"] = merged_words
+    return merged
+
+
+def select_keyframes(paths, showinfo_output, max_distance, hash_fn, distance_fn):
+    """
+    Picks the frames to keep from a scene-detection run.
+
+    Args:
+        paths (list[str]): Extracted frame files, in output order.
+        showinfo_output (str): ffmpeg stderr with one showinfo line (pts_time) per
+                               extracted frame, in the same order.
+        max_distance (int): Frames whose hash is within this many bits of the last
+                            kept frame are dropped as near-duplicates.
+        hash_fn (Callable): path -> hash (e.g. image_hash.dhash).
+        distance_fn (Callable): (hash, hash) -> differing bits (e.g. image_hash.hamming).
+
+    Returns:
+        list[dict]: Frames index entries {"source", "file", "time"} for the kept
+                    frames, named key_0000.png, key_0001.png, ... Each keeps the
+                    presentation time of its own source frame (None if missing).
+    """
+    times = [float(t) for t in re.findall(r"pts_time:\s*([\d.]+)", showinfo_output)]
+    kept = []
+    last_hash = None
+    for i, path in enumerate(paths):
+        frame_hash = hash_fn(path)
+        if last_hash is not None and distance_fn(frame_hash, last_hash) <= max_distance:
+            continue
+        last_hash = frame_hash
+        kept.append({
+            "source": path,
+            "file": f"key_{len(kept):04d}.png",
+            "time": times[i] if i < len(times) else None
+        })
+    return kept
@@ -0,0 +1,113 @@
+import os
+import json
+import numpy as np
+
+EMBEDDINGS_DIRNAME = "embeddings"
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalizes the rows of vectors (float32), leaving all-zero rows as they are."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def file_signature(paths) -> list:
+    """[name, size, mtime_ns] per existing path; changes whenever one of the files does."""
+    signature = []
+    for path in paths:
+        stat = os.stat(path)
+        signature.append([os.path.basename(path), stat.st_size, stat.st_mtime_ns])
+    return signature
+
+
+class VideoEmbeddingStore:
+    """
+    Per-video cache of the VideoQA retrieval artifacts, kept in <video_dir>/embeddings:
+
+        text.json              transcript signature and semantic chunks
+        text_embeddings.npy    one L2-normalized row per chunk
+        frames.json            frame signature and frame file names
+        frame_embeddings.npy   one L2-normalized row per frame
+
+    Embeddings are normalized once when written and opened memory-mapped, so scoring a
+    question is a single matrix-vector product. Each part is invalidated on its own:
+    editing the transcript re-embeds the chunks but keeps the frame embeddings.
+    """
+
+    def __init__(self, video_dir: str):
+        """
+        Args:
+            video_dir (str): Folder of the video project.
+        """
+        self.dir = os.path.join(video_dir, EMBEDDINGS_DIRNAME)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir, name)
+
+    def _load(self, part: str, signature: list):
+        meta_path = self._path(f"{part}.json")
+        array_path = self._path(f"{part}_embeddings.npy")
+        if not os.path.exists(meta_path) or not os.path.exists(array_path):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except ValueError:
+            return None
+        if meta.get("signature") != signature:
+            return None
+        embeddings = np.load(array_path, mmap_mode="r")
+        if embeddings.shape[0] != len(meta["items"]):
+            return None
+        return meta["items"], embeddings
+
+    def _save(self, part: str, signature: list, items: list, batches) -> np.ndarray:
+        """
+        Writes the embeddings of `items` from `batches`, an iterable of (start_row,
+        embeddings) pairs, straight into a memory-mapped file, so only one batch is
+        ever held in memory. The metadata is written last and marks the part as valid.
+        """
+        os.makedirs(self.dir, exist_ok=True)
+        meta_path = self._path(f"{part}.json")
+        array_path = self._path(f"{part}_embeddings.npy")
+
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        tmp_path = array_path + ".tmp.npy"
+        array = None
+        for start, embeddings in batches:
+            if array is None:
+                array = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(len(items), embeddings.shape[1]))
+            array[start:start + len(embeddings)] = normalize(embeddings)
+        if array is None:
+            np.save(tmp_path, np.zeros((0, 0), dtype=np.float32))
+        else:
+            array.flush()
+            del array
+        os.replace(tmp_path, array_path)
+
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"signature": signature, "items": items}, f, ensure_ascii=False)
+        os.replace(meta_path + ".tmp", meta_path)
+        return np.load(array_path, mmap_mode="r")
+
+    def load_text(self, signature: list):
+        """Returns (chunks, embeddings) if cached for this transcript signature, else None."""
+        return self._load("text", signature)
+
+    def save_text(self, signature: list, chunks: list, embeddings: np.ndarray) -> np.ndarray:
+        """Stores the chunks and their normalized embeddings; returns the memory-mapped array."""
+        return self._save("text", signature, list(chunks), [(0, np.asarray(embeddings))])
+
+    def load_frames(self, signature: list):
+        """Returns (frame_names, embeddings) if cached for this frame signature, else None."""
+        return self._load("frames", signature)
+
+    def save_frames(self, signature: list, frame_names: list, batches) -> np.ndarray:
+        """
+        Stores the frame names and their normalized embeddings, written batch by batch
+        from (start_row, embeddings) pairs; returns the memory-mapped array.
+        """
+        return self._save("frames", signature, list(frame_names), batches)
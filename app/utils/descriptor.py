@@ -13,18 +13,25 @@ class Descriptor:
         Updates the descriptor content and automatically saves it to 'current.txt'
         and appends the new version to a history folder.
         """
+        return self.replace(self.generate(final_summary=final_summary))
+
+    def generate(self, final_summary: str = "") -> str:
+        """
+        Returns the updated descriptor for final_summary without changing or saving
+        this one, so the caller can decide when to commit it with replace().
+        """
         from app.chains.generation_chain import GenerationChain
         generation_chain = GenerationChain()
         output = generation_chain.build_descriptor(
             old_descriptor=self,
             final_summary=final_summary
         )
-        new_descriptor = parse_updated_descriptor(output)
-        self.content = new_descriptor
+        return parse_updated_descriptor(output)
 
-        # Save the updated descriptor (both current and history)
+    def replace(self, content: str):
+        """Sets the content and saves it to 'current.txt' and the history folder."""
+        self.content = content
         self._save_with_history()
-
         return self.content
 
     def _save_with_history(self):
@@ -0,0 +1,20 @@
+import numpy as np
+from PIL import Image
+
+
+def dhash(path: str, hash_size: int = 8) -> np.ndarray:
+    """
+    Difference hash of an image: the grayscale image is shrunk to
+    (hash_size + 1) x hash_size and each bit tells whether a pixel is brighter than
+    its right neighbour. Near-identical images (re-encoded slides, a moving cursor)
+    differ in only a few bits.
+    """
+    with Image.open(path) as image:
+        small = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = np.asarray(small, dtype=np.int16)
+    return (pixels[:, 1:] > pixels[:, :-1]).flatten()
+
+
+def hamming(a: np.ndarray, b: np.ndarray) -> int:
+    """Number of differing bits between two hashes."""
+    return int(np.count_nonzero(a != b))
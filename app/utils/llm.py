@@ -1,35 +1,364 @@
 import os
+import time
+import asyncio
+import threading
+import httpx
 from dotenv import load_dotenv
-from groq import Groq
+from groq import Groq, AsyncGroq
+from app.utils.rate_limiter import RateLimitScheduler, GroqRequestError
+from app.utils.tokens import count_tokens, count_message_tokens
+from app.utils.llm_metrics import get_metrics
+from app.utils.llm_cache import LLMResponseCache
 
 load_dotenv()
 
+# Connection pool shared by every GroqModel in the process
+MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "20"))
+DEFAULT_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "4"))
+
+# Client-side budgets; match them to the account's Groq limits
+REQUESTS_PER_MINUTE = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+TOKENS_PER_MINUTE = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "6000"))
+MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "5"))
+
+_clients_lock = threading.Lock()
+_sync_clients = {}
+_async_clients = {}
+_schedulers = {}
+_response_cache = None
+_loop = None
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+
+
+def _shared_client(api_key: str, base_url: str = None) -> Groq:
+    """One pooled sync client per API key and endpoint, reused by every chain."""
+    with _clients_lock:
+        client = _sync_clients.get((api_key, base_url))
+        if client is None:
+            client = Groq(api_key=api_key, base_url=base_url, max_retries=0, http_client=httpx.Client(limits=_pool_limits()))
+            _sync_clients[(api_key, base_url)] = client
+        return client
+
+
+def _shared_scheduler(api_key: str, base_url: str = None) -> RateLimitScheduler:
+    """One scheduler per API key: Groq limits are per key, and retries are done there, not by the SDK."""
+    with _clients_lock:
+        scheduler = _schedulers.get((api_key, base_url))
+        if scheduler is None:
+            scheduler = RateLimitScheduler(
+                requests_per_minute=REQUESTS_PER_MINUTE,
+                tokens_per_minute=TOKENS_PER_MINUTE,
+                max_retries=MAX_RETRIES
+            )
+            _schedulers[(api_key, base_url)] = scheduler
+        return scheduler
+
+
+def rate_limit_stats() -> dict:
+    """
+    Scheduler counters summed over every API key used in this process: requests,
+    retries, rate_limited (429 answers), queue_wait_seconds and backoff_seconds.
+    """
+    with _clients_lock:
+        schedulers = list(_schedulers.values())
+    totals = {"requests": 0, "retries": 0, "rate_limited": 0, "queue_wait_seconds": 0.0, "backoff_seconds": 0.0}
+    for scheduler in schedulers:
+        for name, value in scheduler.stats().items():
+            totals[name] = totals.get(name, 0) + value
+    return totals
+
+
+def configure_response_cache(mode: str = None, path: str = None) -> LLMResponseCache:
+    """
+    Sets the response cache used by every GroqModel. Mode and path default to the
+    LLM_CACHE_MODE ("off") and LLM_CACHE_PATH environment variables.
+    """
+    global _response_cache
+    with _clients_lock:
+        _response_cache = LLMResponseCache(
+            path=path or os.getenv("LLM_CACHE_PATH"),
+            mode=mode or os.getenv("LLM_CACHE_MODE", "off"),
+            max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "200")) * 1024 * 1024)
+        )
+        return _response_cache
+
+
+def _shared_response_cache() -> LLMResponseCache:
+    return _response_cache or configure_response_cache()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Event loop on a daemon thread that owns every async client. Async clients are
+    bound to the loop they first run on, so all async calls are funnelled here
+    instead of creating a loop (and a new connection pool) per call.
+    """
+    global _loop
+    with _clients_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="groq-async-loop", daemon=True).start()
+        return _loop
+
+
+def _shared_async_client(api_key: str, base_url: str = None) -> AsyncGroq:
+    with _clients_lock:
+        client = _async_clients.get((api_key, base_url))
+        if client is None:
+            client = AsyncGroq(api_key=api_key, base_url=base_url, max_retries=0, http_client=httpx.AsyncClient(limits=_pool_limits()))
+            _async_clients[(api_key, base_url)] = client
+        return client
+
+
 class GroqModel:
-    def __init__(self):
-        self.api_key = os.getenv("GROQ_API_KEY")
-        self.model_name = os.getenv("GROQ_MODEL_NAME")
+    def __init__(self, api_key: str = None, model_name: str = None, base_url: str = None):
+        """
+        Args:
+            api_key (str): Defaults to GROQ_API_KEY.
+            model_name (str): Defaults to GROQ_MODEL_NAME.
+            base_url (str): Any Groq-compatible endpoint; defaults to the Groq API.
+        """
+        self.api_key = api_key or os.getenv("GROQ_API_KEY")
+        self.model_name = model_name or os.getenv("GROQ_MODEL_NAME")
+        self.base_url = base_url
         if not self.api_key:
             raise ValueError("Missing GROQ_API_KEY in environment variables.")
 
-        self.client = Groq(api_key=self.api_key)
+        self.client = _shared_client(self.api_key, self.base_url)
+        self.scheduler = _shared_scheduler(self.api_key, self.base_url)
+        self.cache = _shared_response_cache()
+
+    def _record(self, messages: list[dict[str, str]], feature: str, prompt_type: str, call_stats: dict, content: str = "", usage=None, cache_hit: bool = False, stream: bool = False, error: Exception = None):
+        # One metrics record per call; usage comes from the API when available
+        prompt_chars = sum(len(message.get("content", "")) for message in messages)
+        get_metrics().record(
+            feature=feature,
+            prompt_type=prompt_type,
+            model=self.model_name,
+            prompt_chars=prompt_chars,
+            prompt_tokens=getattr(usage, "prompt_tokens", None) or count_message_tokens(messages),
+            completion_tokens=getattr(usage, "completion_tokens", None) or count_tokens(content or ""),
+            queue_wait_s=round(call_stats.get("queue_wait", 0.0), 4),
+            latency_s=round(call_stats.get("latency", 0.0), 4),
+            retries=call_stats.get("retries", 0),
+            cache_hit=cache_hit,
+            stream=stream,
+            **({"error": str(error)} if error is not None else {})
+        )
 
-    def chat_completion(self, messages: list[dict[str, str]]) -> str:
+    def chat_completion(self, messages: list[dict[str, str]], feature: str = None, prompt_type: str = None) -> str:
         """
         Send chat messages to the Groq LLM and return the response content.
 
         Args:
             messages (list): A list of messages like:
                 [{"role": "system", "content": "..."}, {"role": "user", "content": "..."}]
+            feature (str): Prompt feature, recorded in the per-call metrics.
+            prompt_type (str): Prompt type, recorded in the per-call metrics.
 
         Returns:
             str: The generated response.
+
+        Raises:
+            GroqRequestError: If the request fails for good. Rate limits and transient
+                errors are queued and retried by the shared scheduler first.
+            LLMCacheMiss: In replay mode when the prompt was never recorded.
         """
+        call_stats = {}
         try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages
+            cached = self.cache.lookup(self.model_name, messages)
+        except Exception as e:
+            self._record(messages, feature, prompt_type, call_stats, error=e)
+            raise
+        if cached is not None:
+            self._record(messages, feature, prompt_type, call_stats, content=cached, cache_hit=True)
+            return cached
+
+        try:
+            response = self.scheduler.call(
+                lambda: self.client.chat.completions.with_raw_response.create(
+                    model=self.model_name,
+                    messages=messages
+                ),
+                tokens=count_message_tokens(messages),
+                call_stats=call_stats
             )
-            return response.choices[0].message.content
         except Exception as e:
-            print(f"[GroqModel] Error: {e}")
-            return ""
+            self._record(messages, feature, prompt_type, call_stats, error=e)
+            raise
+        content = response.choices[0].message.content
+        self._record(messages, feature, prompt_type, call_stats, content=content, usage=response.usage)
+        self.cache.store(self.model_name, messages, content)
+        return content
+
+    def chat_completion_stream(self, messages: list[dict[str, str]], feature: str = None, prompt_type: str = None):
+        """
+        Streams the response to chat messages, yielding content deltas as they arrive.
+
+        Args:
+            messages (list): Same format as chat_completion.
+            feature (str): Prompt feature, recorded in the per-call metrics.
+            prompt_type (str): Prompt type, recorded in the per-call metrics.
+
+        Yields:
+            str: The next piece of generated text.
+
+        Raises:
+            GroqRequestError: If the request fails for good, or the stream breaks
+                after tokens were already yielded (it cannot be retried then).
+        """
+        call_stats = {}
+        try:
+            cached = self.cache.lookup(self.model_name, messages)
+        except Exception as e:
+            self._record(messages, feature, prompt_type, call_stats, stream=True, error=e)
+            raise
+        if cached is not None:
+            self._record(messages, feature, prompt_type, call_stats, content=cached, cache_hit=True, stream=True)
+            yield cached
+            return
+
+        try:
+            stream = self.scheduler.call(
+                lambda: self.client.chat.completions.with_raw_response.create(
+                    model=self.model_name,
+                    messages=messages,
+                    stream=True
+                ),
+                tokens=count_message_tokens(messages),
+                call_stats=call_stats
+            )
+        except Exception as e:
+            self._record(messages, feature, prompt_type, call_stats, stream=True, error=e)
+            raise
+
+        # call_stats["latency"] is time to the response headers; extend it to the last token
+        started = time.monotonic() - call_stats["latency"]
+        parts = []
+        error = None
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            error = GroqRequestError(f"Groq stream interrupted: {e}")
+            raise error from e
+        finally:
+            # Also runs when the consumer stops early: release the HTTP connection
+            stream.close()
+            call_stats["latency"] = time.monotonic() - started
+            self._record(messages, feature, prompt_type, call_stats, content="".join(parts), stream=True, error=error)
+        self.cache.store(self.model_name, messages, "".join(parts))
+
+    async def _achat_completion(self, messages: list[dict[str, str]], feature: str = None, prompt_type: str = None) -> str:
+        # Runs on the background loop, where the shared async client lives
+        call_stats = {}
+        try:
+            cached = self.cache.lookup(self.model_name, messages)
+        except Exception as e:
+            self._record(messages, feature, prompt_type, call_stats, error=e)
+            raise
+        if cached is not None:
+            self._record(messages, feature, prompt_type, call_stats, content=cached, cache_hit=True)
+            return cached
+
+        client = _shared_async_client(self.api_key, self.base_url)
+        try:
+            response = await self.scheduler.acall(
+                lambda: client.chat.completions.with_raw_response.create(
+                    model=self.model_name,
+                    messages=messages
+                ),
+                tokens=count_message_tokens(messages),
+                call_stats=call_stats
+            )
+        except Exception as e:
+            self._record(messages, feature, prompt_type, call_stats, error=e)
+            raise
+        content = response.choices[0].message.content
+        self._record(messages, feature, prompt_type, call_stats, content=content, usage=response.usage)
+        self.cache.store(self.model_name, messages, content)
+        return content
+
+    async def _on_background_loop(self, coro):
+        # Await coro on the background loop from whatever loop the caller is on
+        loop = _background_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    async def _gather(self, messages_list: list[list[dict[str, str]]], max_concurrency: int, feature: str = None, prompt_type: str = None) -> list[str]:
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def bounded(messages):
+            async with semaphore:
+                return await self._achat_completion(messages, feature, prompt_type)
+
+        return await asyncio.gather(*(bounded(messages) for messages in messages_list))
+
+    async def achat_completion(self, messages: list[dict[str, str]], feature: str = None, prompt_type: str = None) -> str:
+        """
+        Async version of chat_completion, usable from any event loop.
+        """
+        return await self._on_background_loop(self._achat_completion(messages, feature, prompt_type))
+
+    async def achat_completions_many(self, messages_list: list[list[dict[str, str]]], max_concurrency: int = DEFAULT_CONCURRENCY, feature: str = None, prompt_type: str = None) -> list[str]:
+        """
+        Sends several independent conversations concurrently, at most max_concurrency
+        at a time, over the shared connection pool.
+
+        Args:
+            messages_list (list): One message list per completion.
+            max_concurrency (int): Maximum requests in flight.
+            feature (str): Prompt feature of every call, recorded in the per-call metrics.
+            prompt_type (str): Prompt type of every call, recorded in the per-call metrics.
+
+        Returns:
+            list[str]: Responses in the same order as messages_list.
+        """
+        return await self._on_background_loop(self._gather(messages_list, max_concurrency, feature, prompt_type))
+
+    def chat_completions_many(self, messages_list: list[list[dict[str, str]]], max_concurrency: int = DEFAULT_CONCURRENCY, feature: str = None, prompt_type: str = None) -> list[str]:
+        """
+        Sync wrapper around achat_completions_many for non-async callers.
+        """
+        future = asyncio.run_coroutine_threadsafe(self._gather(messages_list, max_concurrency, feature, prompt_type), _background_loop())
+        return future.result()
+
+
+def _local_backend() -> GroqModel:
+    # The stand-in server speaks the Groq wire protocol and ignores the key
+    return GroqModel(
+        api_key=os.getenv("GROQ_API_KEY") or "local",
+        model_name=os.getenv("GROQ_MODEL_NAME") or "standin",
+        base_url=os.getenv("LLM_BASE_URL", "http://127.0.0.1:8787")
+    )
+
+
+BACKENDS = {
+    "groq": GroqModel,
+    "local": _local_backend
+}
+
+
+def get_llm(backend: str = None) -> GroqModel:
+    """
+    Returns the chat model for the configured backend.
+
+    Args:
+        backend (str): "groq" (default) or "local", the stand-in server started with
+                       `study_assistant llm serve` (at LLM_BASE_URL). Defaults to the
+                       LLM_BACKEND environment variable.
+    """
+    backend = backend or os.getenv("LLM_BACKEND", "groq")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{backend}', expected one of {sorted(BACKENDS)}.")
+    return BACKENDS[backend]()
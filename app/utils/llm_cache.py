@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+
+from app.utils.rate_limiter import GroqRequestError
+
+LLM_CACHE_PATH = Path(__file__).resolve().parents[2] / "llm_cache" / "responses.sqlite3"
+
+MODES = ("off", "read_through", "record", "replay")
+
+
+class LLMCacheMiss(GroqRequestError):
+    """Raised in replay mode when a prompt has no recorded response."""
+
+
+class LLMResponseCache:
+    """
+    On-disk cache of chat completions, keyed by model name plus a hash of the full
+    message list.
+
+    Modes:
+        off           never read or write (default).
+        read_through  serve recorded responses, call the LLM and record on a miss.
+        record        always call the LLM and record (refreshes stored responses).
+        replay        serve recorded responses only; a miss raises LLMCacheMiss, so
+                      pipelines can be benchmarked with no network and stable timings.
+
+    Responses are stored in SQLite; once the stored text exceeds max_bytes, the
+    least recently used responses are evicted.
+    """
+
+    def __init__(self, path: str = None, mode: str = "off", max_bytes: int = 200 * 1024 * 1024):
+        if mode not in MODES:
+            raise ValueError(f"Unknown LLM cache mode '{mode}', expected one of {MODES}.")
+        self.path = str(path or LLM_CACHE_PATH)
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def reads(self) -> bool:
+        return self.mode in ("read_through", "replay")
+
+    @property
+    def writes(self) -> bool:
+        return self.mode in ("read_through", "record")
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened lazily so the "off" mode never touches the disk
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, response TEXT, size INTEGER, "
+                "created_at REAL, last_used REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def key(model: str, messages: list[dict[str, str]]) -> str:
+        payload = json.dumps({"model": model, "messages": messages}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, model: str, messages: list[dict[str, str]]):
+        """
+        Returns the recorded response, or None when the LLM has to be called.
+
+        Raises:
+            LLMCacheMiss: In replay mode when nothing was recorded for the prompt.
+        """
+        if not self.reads:
+            return None
+        key = self.key(model, messages)
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                conn.commit()
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+        if self.mode == "replay":
+            raise LLMCacheMiss(f"No recorded LLM response for this prompt (model {model}, key {key[:12]}).")
+        return None
+
+    def store(self, model: str, messages: list[dict[str, str]], response: str):
+        if not self.writes or not response:
+            return
+        key = self.key(model, messages)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response.encode("utf-8")), now, now)
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Evict down to 90% so a full cache does not evict on every write
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            stale.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "mode": self.mode,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
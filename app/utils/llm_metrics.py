@@ -0,0 +1,217 @@
+import os
+import json
+import math
+import time
+import threading
+from pathlib import Path
+from collections import defaultdict
+
+# Kept out of logs/, which holds one folder per session
+LLM_LOGS_DIR = Path(__file__).resolve().parents[2] / "llm_logs"
+
+# Pipeline stage of each (feature, prompt_type)
+STAGES = {
+    ("summarization", "generation"): "summarize",
+    ("summarization", "generation_init"): "summarize",
+    ("summarization", "condensed"): "summarize",
+    ("summarization", "reflection"): "reflect",
+    ("summarization", "regeneration"): "regenerate",
+    ("summarization", "descriptor"): "descriptor",
+    ("question_answering", "qa"): "qa",
+    ("qa_video", "qa"): "qa",
+    ("question_answering", "relevant_block"): "select_block",
+}
+
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def stage_of(feature: str, prompt_type: str) -> str:
+    if not feature and not prompt_type:
+        return "unknown"
+    return STAGES.get((feature, prompt_type), f"{feature}/{prompt_type}")
+
+
+def percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile (q in 0..100) of values; 0.0 when empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class LLMMetrics:
+    """
+    Per-call LLM records.
+
+    Every call is appended as one JSON line to llm_logs/llm_calls.jsonl, rotated at
+    max_bytes with `backups` older files kept (llm_calls.jsonl.1, .2, ...). Running
+    totals for the process are rewritten to llm_logs/llm_metrics.prom in the
+    Prometheus text format, for a node_exporter textfile collector or a quick look.
+
+    Record fields: ts, feature, prompt_type, stage, model, prompt_chars,
+    prompt_tokens, completion_tokens, queue_wait_s, latency_s, retries, cache_hit,
+    stream and, for failed calls, error.
+    """
+
+    LOG_FILE = "llm_calls.jsonl"
+    PROM_FILE = "llm_metrics.prom"
+
+    def __init__(self, log_dir: str = None, max_bytes: int = 5 * 1024 * 1024, backups: int = 3, enabled: bool = True):
+        self.log_dir = str(log_dir or LLM_LOGS_DIR)
+        self.log_path = os.path.join(self.log_dir, self.LOG_FILE)
+        self.prom_path = os.path.join(self.log_dir, self.PROM_FILE)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._totals = defaultdict(lambda: {
+            "calls": 0,
+            "errors": 0,
+            "cache_hits": 0,
+            "retries": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "queue_wait_seconds": 0.0,
+            "latency_seconds": 0.0,
+            "buckets": [0] * len(LATENCY_BUCKETS)
+        })
+
+    def record(self, feature: str = None, prompt_type: str = None, **fields) -> dict:
+        record = {
+            "ts": time.time(),
+            "feature": feature,
+            "prompt_type": prompt_type,
+            "stage": stage_of(feature, prompt_type),
+            **fields
+        }
+        if not self.enabled:
+            return record
+
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            os.makedirs(self.log_dir, exist_ok=True)
+            self._rotate(len(line.encode("utf-8")))
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self._add_to_totals(record)
+            self._write_prometheus()
+        return record
+
+    def _rotate(self, incoming: int):
+        if not os.path.exists(self.log_path) or os.path.getsize(self.log_path) + incoming <= self.max_bytes:
+            return
+        for index in range(self.backups - 1, 0, -1):
+            older = f"{self.log_path}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.log_path}.{index + 1}")
+        if self.backups:
+            os.replace(self.log_path, f"{self.log_path}.1")
+        else:
+            os.remove(self.log_path)
+
+    def _add_to_totals(self, record: dict):
+        totals = self._totals[record["stage"]]
+        totals["calls"] += 1
+        totals["errors"] += 1 if record.get("error") else 0
+        totals["cache_hits"] += 1 if record.get("cache_hit") else 0
+        totals["retries"] += record.get("retries", 0)
+        totals["prompt_tokens"] += record.get("prompt_tokens", 0)
+        totals["completion_tokens"] += record.get("completion_tokens", 0)
+        totals["queue_wait_seconds"] += record.get("queue_wait_s", 0.0)
+        latency = record.get("latency_s", 0.0)
+        totals["latency_seconds"] += latency
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if latency <= bound:
+                totals["buckets"][i] += 1
+
+    def _write_prometheus(self):
+        lines = []
+        counters = [
+            ("llm_calls_total", "calls", "LLM calls"),
+            ("llm_errors_total", "errors", "LLM calls that failed"),
+            ("llm_cache_hits_total", "cache_hits", "LLM calls served from the response cache"),
+            ("llm_retries_total", "retries", "Retries after rate limits or transient errors"),
+            ("llm_prompt_tokens_total", "prompt_tokens", "Prompt tokens"),
+            ("llm_completion_tokens_total", "completion_tokens", "Completion tokens"),
+            ("llm_queue_wait_seconds_total", "queue_wait_seconds", "Seconds spent queued for rate-limit budget"),
+        ]
+        for name, key, help_text in counters:
+            lines.append(f"# HELP {name} {help_text}.")
+            lines.append(f"# TYPE {name} counter")
+            for stage, totals in sorted(self._totals.items()):
+                lines.append(f'{name}{{stage="{stage}"}} {totals[key]}')
+
+        lines.append("# HELP llm_latency_seconds Network latency of LLM calls.")
+        lines.append("# TYPE llm_latency_seconds histogram")
+        for stage, totals in sorted(self._totals.items()):
+            for bound, count in zip(LATENCY_BUCKETS, totals["buckets"]):
+                lines.append(f'llm_latency_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'llm_latency_seconds_bucket{{stage="{stage}",le="+Inf"}} {totals["calls"]}')
+            lines.append(f'llm_latency_seconds_sum{{stage="{stage}"}} {totals["latency_seconds"]}')
+            lines.append(f'llm_latency_seconds_count{{stage="{stage}"}} {totals["calls"]}')
+
+        tmp_path = self.prom_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.prom_path)
+
+    def read_records(self) -> list:
+        """All records still on disk, oldest first (rotated files included)."""
+        paths = [f"{self.log_path}.{index}" for index in range(self.backups, 0, -1)] + [self.log_path]
+        records = []
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        try:
+                            records.append(json.loads(line))
+                        except ValueError:
+                            continue  # partial line from an interrupted write
+        return records
+
+    @staticmethod
+    def summarize(records: list) -> dict:
+        """
+        Per stage: calls, p50/p95 latency, average and largest prompt size in tokens,
+        average queue wait, retries, cache hit rate and errors. Cache hits are left
+        out of the latency percentiles.
+        """
+        by_stage = defaultdict(list)
+        for record in records:
+            by_stage[record.get("stage", "unknown")].append(record)
+
+        summary = {}
+        for stage, stage_records in by_stage.items():
+            latencies = [r.get("latency_s", 0.0) for r in stage_records if not r.get("cache_hit") and not r.get("error")]
+            summary[stage] = {
+                "calls": len(stage_records),
+                "p50_latency_s": percentile(latencies, 50),
+                "p95_latency_s": percentile(latencies, 95),
+                "avg_prompt_tokens": sum(r.get("prompt_tokens", 0) for r in stage_records) / len(stage_records),
+                "max_prompt_tokens": max(r.get("prompt_tokens", 0) for r in stage_records),
+                "avg_queue_wait_s": sum(r.get("queue_wait_s", 0.0) for r in stage_records) / len(stage_records),
+                "retries": sum(r.get("retries", 0) for r in stage_records),
+                "cache_hit_rate": sum(1 for r in stage_records if r.get("cache_hit")) / len(stage_records),
+                "errors": sum(1 for r in stage_records if r.get("error"))
+            }
+        return summary
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> LLMMetrics:
+    """Process-wide metrics sink; LLM_METRICS=off disables writing, LLM_METRICS_DIR moves it."""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = LLMMetrics(
+                log_dir=os.getenv("LLM_METRICS_DIR"),
+                enabled=os.getenv("LLM_METRICS", "on").lower() not in ("off", "0", "false")
+            )
+        return _metrics
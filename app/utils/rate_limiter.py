@@ -0,0 +1,258 @@
+import re
+import time
+import random
+import asyncio
+import inspect
+import threading
+from collections import deque
+
+import groq
+
+
+class GroqRequestError(RuntimeError):
+    """Raised when a Groq call fails for good: a non-retryable error, or retries exhausted."""
+
+
+def parse_duration(value) -> float:
+    """
+    Parses Groq rate-limit durations into seconds. Returns None if value is missing
+    or unreadable.
+
+    retry-after is plain seconds ("2"); x-ratelimit-reset-* look like "7.66s",
+    "2m59.56s" or "320ms".
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r"([\d.]+)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    units = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+    return sum(float(amount) * units[unit] for amount, unit in parts)
+
+
+class RateLimitScheduler:
+    """
+    Client-side scheduler shared by every GroqModel using the same API key.
+
+    Calls reserve a slot in a sliding one-minute window of request and token budgets
+    and wait (queue) until one is free instead of being sent into a 429. Rate-limit
+    headers from Groq tighten the schedule when the server is closer to its limits
+    than the local budget thinks, and retryable failures (429, 5xx, connection errors)
+    are retried with jittered exponential backoff, honouring retry-after.
+
+    Counters for requests, retries, rate-limited responses and time spent waiting are
+    available from stats().
+    """
+
+    RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+    WINDOW_SECONDS = 60.0
+
+    def __init__(self, requests_per_minute: int = 30, tokens_per_minute: int = 6000, max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._window = deque()  # [start_time, tokens] for each request of the last minute
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self.counters = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "queue_wait_seconds": 0.0,
+            "backoff_seconds": 0.0
+        }
+
+    # --- Budgets ---
+    def _try_reserve(self, tokens: int):
+        """
+        Reserves budget for one request if possible. Returns (0.0, entry) on success,
+        or (seconds_to_wait, None) when the request has to wait.
+        """
+        with self._lock:
+            now = time.monotonic()
+            while self._window and now - self._window[0][0] >= self.WINDOW_SECONDS:
+                self._window.popleft()
+
+            wait = max(0.0, self._blocked_until - now)
+            if not wait and len(self._window) >= self.requests_per_minute:
+                wait = self._window[0][0] + self.WINDOW_SECONDS - now
+
+            used = sum(entry[1] for entry in self._window)
+            # A single request bigger than the whole budget still goes out on an empty window
+            if not wait and self._window and used + tokens > self.tokens_per_minute:
+                excess = used + tokens - self.tokens_per_minute
+                freed = 0
+                for start, entry_tokens in self._window:
+                    freed += entry_tokens
+                    if freed >= excess:
+                        wait = start + self.WINDOW_SECONDS - now
+                        break
+
+            if wait > 0:
+                return wait, None
+
+            entry = [now, tokens]
+            self._window.append(entry)
+            self.counters["requests"] += 1
+            return 0.0, entry
+
+    def acquire(self, tokens: int, call_stats: dict = None) -> list:
+        """Blocks until the request fits in the budgets, then reserves it."""
+        while True:
+            wait, entry = self._try_reserve(tokens)
+            if entry is not None:
+                return entry
+            self._count_wait("queue_wait_seconds", wait, call_stats)
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int, call_stats: dict = None) -> list:
+        while True:
+            wait, entry = self._try_reserve(tokens)
+            if entry is not None:
+                return entry
+            self._count_wait("queue_wait_seconds", wait, call_stats)
+            await asyncio.sleep(wait)
+
+    def settle(self, entry: list, tokens: int):
+        """Replaces a reservation's estimate with the real token usage."""
+        with self._lock:
+            entry[1] = tokens
+
+    def observe_headers(self, headers):
+        """Pauses every queued call until the reset time when Groq reports an exhausted limit."""
+        if headers is None:
+            return
+        pause = 0.0
+        for limit in ("requests", "tokens"):
+            remaining = headers.get(f"x-ratelimit-remaining-{limit}")
+            try:
+                exhausted = remaining is not None and float(remaining) <= 0
+            except ValueError:
+                exhausted = False
+            if exhausted:
+                pause = max(pause, parse_duration(headers.get(f"x-ratelimit-reset-{limit}")) or 0.0)
+        if pause:
+            self._pause(pause)
+
+    def _pause(self, seconds: float):
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def _count_wait(self, counter: str, seconds: float, call_stats: dict = None):
+        with self._lock:
+            self.counters[counter] += seconds
+        if call_stats is not None:
+            call_stats["queue_wait"] += seconds
+
+    # --- Retries ---
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """
+        Returns how long to back off before retrying after error, or raises
+        GroqRequestError if the error is not retryable or retries are exhausted.
+        """
+        if isinstance(error, groq.APIStatusError):
+            retryable = error.status_code in self.RETRYABLE_STATUS
+        else:
+            retryable = isinstance(error, groq.APIConnectionError)  # includes timeouts
+
+        if not retryable:
+            raise GroqRequestError(f"Groq request failed: {error}") from error
+        if attempt >= self.max_retries:
+            raise GroqRequestError(f"Groq request failed after {attempt + 1} attempts: {error}") from error
+
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if isinstance(error, groq.APIStatusError):
+            headers = error.response.headers
+            if error.status_code == 429:
+                with self._lock:
+                    self.counters["rate_limited"] += 1
+                retry_after = parse_duration(headers.get("retry-after"))
+                if retry_after is not None:
+                    # Everyone sharing the key waits, plus jitter so they do not return together
+                    delay = retry_after + random.uniform(0, self.base_delay)
+                    self._pause(retry_after)
+            self.observe_headers(headers)
+
+        with self._lock:
+            self.counters["retries"] += 1
+            self.counters["backoff_seconds"] += delay
+        return delay
+
+    def _settle_usage(self, entry: list, result):
+        usage = getattr(result, "usage", None)
+        if usage is not None and getattr(usage, "total_tokens", None):
+            self.settle(entry, usage.total_tokens)
+
+    @staticmethod
+    def _new_call_stats(call_stats: dict) -> dict:
+        if call_stats is None:
+            call_stats = {}
+        call_stats.update(queue_wait=0.0, retries=0, latency=0.0)
+        return call_stats
+
+    def call(self, request_fn, tokens: int, call_stats: dict = None):
+        """
+        Runs request_fn under the budgets, retrying retryable failures.
+
+        Args:
+            request_fn (callable): Sends the request and returns a Groq raw response
+                (client.chat.completions.with_raw_response.create(...)).
+            tokens (int): Estimated tokens of the request, used until real usage is known.
+            call_stats (dict): Optional dict filled with this call's queue_wait,
+                retries and latency (seconds of the successful request).
+
+        Returns:
+            The parsed response (a ChatCompletion, or a Stream when streaming).
+
+        Raises:
+            GroqRequestError: On a non-retryable error or when retries are exhausted.
+        """
+        call_stats = self._new_call_stats(call_stats)
+        while True:
+            entry = self.acquire(tokens, call_stats)
+            started = time.monotonic()
+            try:
+                raw = request_fn()
+            except Exception as e:
+                delay = self._retry_delay(e, call_stats["retries"])
+                call_stats["retries"] += 1
+                time.sleep(delay)
+                continue
+            self.observe_headers(raw.headers)
+            result = raw.parse()
+            call_stats["latency"] = time.monotonic() - started
+            self._settle_usage(entry, result)
+            return result
+
+    async def acall(self, request_fn, tokens: int, call_stats: dict = None):
+        """Async version of call; request_fn returns an awaitable raw response."""
+        call_stats = self._new_call_stats(call_stats)
+        while True:
+            entry = await self.aacquire(tokens, call_stats)
+            started = time.monotonic()
+            try:
+                raw = await request_fn()
+            except Exception as e:
+                delay = self._retry_delay(e, call_stats["retries"])
+                call_stats["retries"] += 1
+                await asyncio.sleep(delay)
+                continue
+            self.observe_headers(raw.headers)
+            result = raw.parse()
+            if inspect.isawaitable(result):
+                result = await result
+            call_stats["latency"] = time.monotonic() - started
+            self._settle_usage(entry, result)
+            return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
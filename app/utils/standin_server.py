@@ -0,0 +1,257 @@
+import re
+import ast
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.utils.tokens import count_tokens, count_message_tokens
+
+CHAT_PATHS = ("/openai/v1/chat/completions", "/v1/chat/completions")
+TRANSCRIPTION_PATHS = ("/openai/v1/audio/transcriptions", "/v1/audio/transcriptions")
+TRANSCRIPT_SEGMENT_SECONDS = 5.0
+
+
+def canned_response(prompt: str) -> str:
+    """
+    Builds a response with the delimiters the pipeline parsers expect, using values
+    found in the prompt (block ids, frame paths, timestamps) so downstream steps
+    can run on it.
+    """
+    if "<<UPDATED_DESCRIPTOR>>" in prompt:
+        return (
+            "<<UPDATED_DESCRIPTOR>>\n"
+            "- Global summary: stand-in descriptor covering the session topics\n"
+            "- Key concepts and examples from the latest notes\n"
+            "<<UPDATED_DESCRIPTOR>>"
+        )
+
+    if "<<FINAL_SUMMARY>>" in prompt:
+        return (
+            "<<FINAL_SUMMARY>>\n"
+            "# 📘 Stand-in Summary\n\n"
+            "## Key Points\n"
+            "- ✅ The revised summary keeps the structure of the initial one.\n"
+            "- 💡 Critique points were merged into the relevant sections.\n"
+            "<<FINAL_SUMMARY>>"
+        )
+
+    if "<<blockids>>" in prompt:
+        block_ids, page_id, page_title = ["stand-in-block"], "stand-in-page", "Stand-in Page"
+        match = re.search(r"RETRIEVED PARAGRAPHS:\n(.*?)\n\(Format example", prompt, re.DOTALL)
+        if match:
+            try:
+                paragraphs = ast.literal_eval(match.group(1).strip())
+                if paragraphs:
+                    block_ids = paragraphs[0].get("block_ids", block_ids)
+                    page_id = paragraphs[0].get("page_id", page_id)
+                    page_title = paragraphs[0].get("page_title", page_title)
+            except (ValueError, SyntaxError):
+                pass
+        return (
+            f"<<blockids>>\n{block_ids!r}\n<<blockids>>\n\n"
+            f"<<pageid>>\n'{page_id}'\n<<pageid>>\n\n"
+            f"<<pagetitle>>\n'{page_title}'\n<<pagetitle>>"
+        )
+
+    if "<<RETRIEVED_IMAGES>>" in prompt:
+        # Only the path lines of the frames section, up to the next blank line
+        frames_section = prompt.split("Top Retrieved Frames:", 1)[-1].strip("\n").split("\n\n", 1)[0]
+        frames = re.findall(r"^\S+\.(?:png|jpg|jpeg)$", frames_section, re.MULTILINE | re.IGNORECASE)[:3]
+        timestamps = re.findall(r"\[([\d.]+\s*-\s*[\d.]+)\]", prompt)
+        timestamp = timestamps[0] if timestamps else "0.00 - 5.00"
+        return (
+            "**Direct Answer**\nStand-in answer based on the retrieved transcript.\n\n"
+            "**Detailed Explanation**\n- Step one\n- Step two\n\n"
+            f"<<RETRIEVED_IMAGES>>\n{json.dumps(frames)}\n<<RETRIEVED_IMAGES>>\n\n"
+            f"<<BEST_TIMESTAMP>>\n<<{timestamp}>>\n<<BEST_TIMESTAMP>>"
+        )
+
+    return (
+        "# 📘 Stand-in Response\n\n"
+        "## Overview\n"
+        "- ✅ This response comes from the local stand-in LLM server.\n"
+        "- 💡 It has the shape of a real answer so the pipeline can be timed end to end.\n"
+    )
+
+
+def canned_transcription(index: int, segments: int = 3) -> dict:
+    """verbose_json for one upload: `segments` consecutive segments starting at 0s."""
+    return {
+        "task": "transcribe",
+        "language": "english",
+        "duration": segments * TRANSCRIPT_SEGMENT_SECONDS,
+        "text": " ".join(f"Stand-in transcript {index}, part {i}." for i in range(segments)),
+        "segments": [
+            {
+                "id": i,
+                "start": i * TRANSCRIPT_SEGMENT_SECONDS,
+                "end": (i + 1) * TRANSCRIPT_SEGMENT_SECONDS,
+                "text": f" Stand-in transcript {index}, part {i}."
+            }
+            for i in range(segments)
+        ]
+    }
+
+
+class StandinLLMServer:
+    """
+    Local Groq/OpenAI-compatible chat completions and audio transcriptions server
+    for offline load tests.
+
+    Point the app at it with LLM_BACKEND=local and, for VideoQA, with
+    GROQ_TRANSCRIPTION_URL=<base_url>/openai/v1/audio/transcriptions. Responses are
+    canned but delimiter-correct (see canned_response), and provider behaviour is
+    simulated:
+
+    Args:
+        latency (float): Seconds before the first token.
+        jitter (float): Random extra latency, uniform in [0, jitter].
+        tokens_per_second (float): Generation throughput; 0 disables the delay.
+        error_rate (float): Fraction of requests answered with error_status.
+        error_status (int): 429 (sent with retry-after) or a 5xx code.
+        retry_after (float): retry-after seconds sent with injected 429s.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8787, latency: float = 0.5, jitter: float = 0.0, tokens_per_second: float = 200.0, error_rate: float = 0.0, error_status: int = 429, retry_after: float = 1.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.counters = {"requests": 0, "errors": 0, "transcriptions": 0}
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path in CHAT_PATHS:
+                    server._handle_chat(self, json.loads(raw or b"{}"))
+                elif self.path in TRANSCRIPTION_PATHS:
+                    # The multipart upload is not decoded: every file gets a canned transcript
+                    server._handle_transcription(self)
+                else:
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+            def _send_json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def _inject_error(self, handler) -> bool:
+        """Counts the request and answers it with error_status at error_rate. Returns True if it did."""
+        with self._lock:
+            self.counters["requests"] += 1
+            failed = random.random() < self.error_rate
+            if failed:
+                self.counters["errors"] += 1
+
+        if failed:
+            headers = {"retry-after": str(self.retry_after)} if self.error_status == 429 else {}
+            handler._send_json(self.error_status, {"error": {"message": "Injected error from stand-in server"}}, headers)
+        return failed
+
+    def _handle_transcription(self, handler):
+        if self._inject_error(handler):
+            return
+        with self._lock:
+            index = self.counters["transcriptions"]
+            self.counters["transcriptions"] += 1
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+        handler._send_json(200, canned_transcription(index))
+
+    def _handle_chat(self, handler, body: dict):
+        if self._inject_error(handler):
+            return
+
+        messages = body.get("messages", [])
+        prompt = messages[-1]["content"] if messages else ""
+        content = canned_response(prompt)
+        model = body.get("model") or "standin"
+        prompt_tokens = count_message_tokens(messages)
+        completion_tokens = count_tokens(content)
+
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+
+        if body.get("stream"):
+            self._stream(handler, model, content)
+            return
+
+        if self.tokens_per_second:
+            time.sleep(completion_tokens / self.tokens_per_second)
+        handler._send_json(200, {
+            "id": f"standin-{time.time_ns()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        })
+
+    def _stream(self, handler, model: str, content: str):
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+
+        # Roughly one token per piece, paced at tokens_per_second
+        pieces = re.findall(r"\s*\S{1,4}|\s+", content)
+        delay = 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+        for piece in pieces:
+            chunk = {
+                "id": "standin",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+            }
+            handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            handler.wfile.flush()
+            if delay:
+                time.sleep(delay)
+        handler.wfile.write(b"data: [DONE]\n\n")
+        handler.wfile.flush()
+
+    def start(self) -> "StandinLLMServer":
+        """Serves on a daemon thread, for in-process load tests."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="standin-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
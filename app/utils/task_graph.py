@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class TaskGraph:
+    """
+    Small dependency graph of named tasks.
+
+    Each task is a function called with the results of its dependencies as keyword
+    arguments. A task starts as soon as all of its dependencies have finished, so
+    independent tasks run concurrently on a thread pool. The first failure cancels
+    the tasks that have not started yet and is raised from run().
+
+    Example:
+        graph = TaskGraph()
+        graph.add("page", fetch_page)
+        graph.add("draft", summarize)
+        graph.add("critique", lambda page, draft: reflect(draft, page), deps=["page", "draft"])
+        results = graph.run()
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self.tasks = {}  # name -> (fn, deps), in insertion order
+        self.timings = {}
+
+    def add(self, name: str, fn, deps=()) -> "TaskGraph":
+        if name in self.tasks:
+            raise ValueError(f"Task '{name}' is already in the graph.")
+        missing = [dep for dep in deps if dep not in self.tasks]
+        if missing:
+            # Dependencies must be added first, which also rules out cycles
+            raise ValueError(f"Task '{name}' depends on unknown task(s): {missing}")
+        self.tasks[name] = (fn, list(deps))
+        return self
+
+    def run(self) -> dict:
+        """
+        Runs every task and returns {name: result}. Per-task durations in seconds
+        are left in self.timings.
+        """
+        results = {}
+        self.timings = {}
+        pending = dict(self.tasks)
+        running = {}
+
+        def timed(name, fn, kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(**kwargs)
+            finally:
+                self.timings[name] = time.perf_counter() - started
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                for name, (fn, deps) in list(pending.items()):
+                    if all(dep in results for dep in deps):
+                        kwargs = {dep: results[dep] for dep in deps}
+                        running[pool.submit(timed, name, fn, kwargs)] = name
+                        del pending[name]
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        for other in running:
+                            other.cancel()
+                        raise error
+                    results[name] = future.result()
+
+        return results
@@ -0,0 +1,24 @@
+import math
+
+# Llama-family tokenizers average roughly four characters of English per token
+CHARS_PER_TOKEN = 4
+
+
+def count_tokens(text: str) -> int:
+    """
+    Cheap token estimate for budgeting prompts, without loading a tokenizer.
+
+    Args:
+        text (str): Any text.
+
+    Returns:
+        int: Estimated number of tokens.
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def count_message_tokens(messages: list[dict[str, str]]) -> int:
+    """Estimated prompt tokens of a chat message list, with a small per-message overhead."""
+    return sum(count_tokens(message.get("content", "")) + 4 for message in messages)
@@ -0,0 +1,20 @@
+from app.memory.answer_cache import AnswerCache
+
+
+def test_answers_are_scoped_to_retrieval_settings(tmp_path):
+    cache = AnswerCache(persist_directory=str(tmp_path), project="kb")
+    plain = AnswerCache.retrieval_key(k=10, hybrid=False, context_tokens=2000)
+    hybrid = AnswerCache.retrieval_key(k=10, hybrid=True, context_tokens=2000)
+    more = AnswerCache.retrieval_key(k=20, hybrid=False, context_tokens=2000)
+
+    cache.store("What is RRF?", [1.0, 0.0], "Rank fusion.", ["https://notion.so/x"], "['b1']", "v1", retrieval=plain)
+
+    assert cache.lookup([1.0, 0.0], "v1", retrieval=plain)["answer"] == "Rank fusion."
+    assert cache.lookup([1.0, 0.0], "v1", retrieval=hybrid) is None
+    assert cache.lookup([1.0, 0.0], "v1", retrieval=more) is None
+    # A re-index drops everything
+    assert cache.lookup([1.0, 0.0], "v2", retrieval=plain) is None
+
+
+def test_retrieval_key_ignores_argument_order():
+    assert AnswerCache.retrieval_key(k=5, hybrid=True) == AnswerCache.retrieval_key(hybrid=True, k=5)
@@ -0,0 +1,36 @@
+import numpy as np
+
+from app.memory.embedding_cache import EmbeddingCache
+
+
+def fake_encode(texts):
+    return np.array([[len(text), 1.0, 0.0] for text in texts], dtype=np.float32)
+
+
+def test_index_is_written_once_per_interval_and_on_flush(tmp_path, monkeypatch):
+    cache = EmbeddingCache("test-model", cache_dir=str(tmp_path))
+    saves = []
+    save_index = cache._save_index
+    monkeypatch.setattr(cache, "_save_index", lambda: (saves.append(1), save_index()))
+
+    for i in range(50):
+        cache.encode([f"text {i}"], fake_encode)
+    assert len(saves) == 0
+
+    cache.flush()
+    assert len(saves) == 1
+    cache.flush()
+    assert len(saves) == 1
+
+
+def test_flushed_entries_survive_reload(tmp_path):
+    cache = EmbeddingCache("test-model", cache_dir=str(tmp_path))
+    first = cache.encode(["alpha", "beta"], fake_encode)
+    cache.flush()
+
+    reloaded = EmbeddingCache("test-model", cache_dir=str(tmp_path))
+    calls = []
+    again = reloaded.encode(["alpha", "beta"], lambda texts: calls.append(texts) or fake_encode(texts))
+    assert calls == []
+    assert np.array_equal(first, again)
+    assert reloaded.stats()["hits"] == 2
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from app.services.video_media import select_keyframes
+
+SHOWINFO = "\n".join([
+    "[Parsed_showinfo_1 @ 0x5581] config in time_base: 1/15360, frame_rate: 30/1",
+    "[Parsed_showinfo_1 @ 0x5581] n:   0 pts:      0 pts_time:0       duration:512 fmt:yuv420p",
+    "[Parsed_showinfo_1 @ 0x5581] n:   1 pts: 189440 pts_time:12.3333 duration:512 fmt:yuv420p",
+    "[Parsed_showinfo_1 @ 0x5581] n:   2 pts: 363520 pts_time:23.6667 duration:512 fmt:yuv420p",
+    "[Parsed_showinfo_1 @ 0x5581] n:   3 pts: 921600 pts_time:60      duration:512 fmt:yuv420p",
+])
+
+
+def bits(*ones, size=64):
+    value = np.zeros(size, dtype=bool)
+    value[list(ones)] = True
+    return value
+
+
+def count_bits(a, b):
+    return int(np.count_nonzero(a != b))
+
+
+def test_kept_frames_keep_their_own_time():
+    hashes = {
+        "temp_00001.png": bits(),
+        "temp_00002.png": bits(1, 2),  # a cursor moved: dropped
+        "temp_00003.png": bits(*range(20)),
+        "temp_00004.png": bits(*range(40, 60)),
+    }
+    kept = select_keyframes(list(hashes), SHOWINFO, max_distance=6, hash_fn=hashes.get, distance_fn=count_bits)
+
+    assert kept == [
+        {"source": "temp_00001.png", "file": "key_0000.png", "time": 0.0},
+        {"source": "temp_00003.png", "file": "key_0001.png", "time": 23.6667},
+        {"source": "temp_00004.png", "file": "key_0002.png", "time": 60.0},
+    ]
+
+
+def test_frames_are_compared_with_the_last_kept_frame():
+    # Each step is small, but the drift from the last kept frame adds up
+    hashes = {f"temp_{i:05d}.png": bits(*range(4 * i)) for i in range(4)}
+    kept = select_keyframes(list(hashes), SHOWINFO, max_distance=6, hash_fn=hashes.get, distance_fn=count_bits)
+
+    assert [frame["source"] for frame in kept] == ["temp_00000.png", "temp_00002.png"]
+    assert [frame["time"] for frame in kept] == [0.0, 23.6667]
+
+
+def test_missing_times_are_none():
+    hashes = {"a.png": bits(), "b.png": bits(*range(32))}
+    kept = select_keyframes(list(hashes), "", max_distance=6, hash_fn=hashes.get, distance_fn=count_bits)
+
+    assert [frame["time"] for frame in kept] == [None, None]
+
+
+def test_near_identical_pngs_are_dropped_and_other_slides_kept(tmp_path):
+    pytest.importorskip("PIL")
+    from PIL import Image, ImageDraw
+    from app.utils.image_hash import dhash, hamming
+
+    def slide(name, bars, noise=0):
+        image = Image.new("RGB", (320, 180), "white")
+        draw = ImageDraw.Draw(image)
+        for x0, y0, x1, y1 in bars:
+            draw.rectangle((x0, y0, x1, y1), fill="black")
+        if noise:
+            # A few stray pixels, like compression noise or a cursor
+            draw.rectangle((300, 170, 300 + noise, 170 + noise), fill="gray")
+        path = tmp_path / name
+        image.save(path)
+        return str(path)
+
+    title = [(20, 20, 300, 40)]
+    bullets = [(20, 20, 300, 40), (40, 70, 200, 80), (40, 100, 260, 110), (40, 130, 150, 140)]
+    diagram = [(100, 0, 140, 180), (200, 40, 320, 120)]
+    paths = [
+        slide("temp_00001.png", title),
+        slide("temp_00002.png", title, noise=2),
+        slide("temp_00003.png", bullets),
+        slide("temp_00004.png", diagram),
+    ]
+    kept = select_keyframes(paths, SHOWINFO, max_distance=6, hash_fn=dhash, distance_fn=hamming)
+
+    assert [frame["source"] for frame in kept] == [paths[0], paths[2], paths[3]]
+    assert [frame["time"] for frame in kept] == [0.0, 23.6667, 60.0]
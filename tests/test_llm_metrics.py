@@ -0,0 +1,25 @@
+from app.utils.llm_metrics import LLMMetrics, percentile
+
+
+def test_percentile_nearest_rank():
+    assert percentile(list(range(1, 11)), 50) == 5
+    assert percentile(list(range(1, 5)), 50) == 2
+    assert percentile(list(range(1, 21)), 95) == 19
+    assert percentile(list(range(1, 101)), 95) == 95
+    assert percentile(list(range(1, 101)), 100) == 100
+    assert percentile([7.0], 50) == 7.0
+    assert percentile([], 95) == 0.0
+
+
+def test_percentile_ignores_input_order():
+    assert percentile([5, 1, 4, 2, 3], 50) == 3
+
+
+def test_summarize_leaves_cache_hits_out_of_latency():
+    records = [{"stage": "qa", "latency_s": float(i)} for i in range(1, 11)]
+    records.append({"stage": "qa", "latency_s": 0.0, "cache_hit": True})
+    summary = LLMMetrics.summarize(records)["qa"]
+    assert summary["calls"] == 11
+    assert summary["p50_latency_s"] == 5.0
+    assert summary["p95_latency_s"] == 10.0
+    assert summary["cache_hit_rate"] == 1 / 11
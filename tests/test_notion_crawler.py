@@ -0,0 +1,105 @@
+import copy
+import random
+import time
+
+import pytest
+
+from app.services.notion_crawler import NotionCrawler
+
+# parent_id -> child page ids; every page also holds one paragraph block
+TREE = {
+    "root": ["a", "b", "c"],
+    "a": ["a1", "a2"],
+    "a1": ["a1x"],
+    "b": [],
+    "c": ["c1", "c2", "c3"],
+}
+DEPTH_FIRST = ["a", "a1", "a1x", "a2", "b", "c", "c1", "c2", "c3"]
+
+
+class RateLimited(Exception):
+    code = "rate_limited"
+    headers = {"retry-after": "0"}
+
+
+class FakeNotionClient:
+    """Answers blocks.children.list from TREE, two blocks per response, with random latency."""
+
+    PAGE_SIZE = 2
+
+    def __init__(self, rate_limit_first: int = 0):
+        self.blocks = self
+        self.children = self
+        self.calls = 0
+        self.rate_limit_first = rate_limit_first
+
+    def _blocks(self, block_id):
+        blocks = [{
+            "id": f"{block_id}-text",
+            "type": "paragraph",
+            "paragraph": {"rich_text": [{"plain_text": f"Text of {block_id}"}]}
+        }]
+        for child_id in TREE.get(block_id, []):
+            blocks.append({"id": child_id, "type": "child_page", "child_page": {"title": f"Page {child_id}"}})
+        return blocks
+
+    def list(self, block_id, start_cursor=None, page_size=100):
+        self.calls += 1
+        if self.calls <= self.rate_limit_first:
+            raise RateLimited()
+        time.sleep(random.uniform(0, 0.01))
+        start = int(start_cursor or 0)
+        blocks = self._blocks(block_id)
+        end = start + self.PAGE_SIZE
+        # Copies, since normalize_blocks rewrites rich_text in place
+        return {
+            "results": copy.deepcopy(blocks[start:end]),
+            "has_more": end < len(blocks),
+            "next_cursor": str(end) if end < len(blocks) else None
+        }
+
+
+def crawl(client, **kwargs):
+    records = []
+    crawler = NotionCrawler(client, requests_per_second=1000, **kwargs)
+    order = crawler.crawl("root", on_page=records.append)
+    return order, {record["id"]: record for record in records}
+
+
+def test_crawl_matches_depth_first_walk():
+    order, records = crawl(FakeNotionClient(), max_workers=4)
+
+    assert order == DEPTH_FIRST
+    assert set(records) == set(DEPTH_FIRST)
+    parents = {child: parent for parent, children in TREE.items() for child in children}
+    for page_id, record in records.items():
+        assert record["parent_id"] == parents[page_id]
+        assert record["title"] == f"Page {page_id}"
+        assert record["blocks"][0] == {"id": f"{page_id}-text", "type": "paragraph", "content": {"rich_text": [f"Text of {page_id}"]}}
+
+
+def test_concurrent_crawl_equals_single_worker_crawl():
+    sequential = crawl(FakeNotionClient(), max_workers=1)
+    for _ in range(5):
+        assert crawl(FakeNotionClient(), max_workers=8) == sequential
+
+
+def test_rate_limited_requests_are_retried():
+    client = FakeNotionClient(rate_limit_first=2)
+    order, _ = crawl(client, max_workers=4)
+    assert order == DEPTH_FIRST
+
+
+def test_manager_concurrent_crawl_equals_sequential_crawl(tmp_path):
+    pytest.importorskip("notion_client")
+    from app.services.notion_manager import NotionManager
+
+    manager = NotionManager.__new__(NotionManager)
+    manager.notion = FakeNotionClient()
+    manager.output_dir = str(tmp_path / "sequential")
+    sequential = manager.get_pages_hierarchy("root")
+    manager.output_dir = str(tmp_path / "concurrent")
+    concurrent = manager.get_pages_hierarchy_concurrent("root", max_workers=8, requests_per_second=1000)
+
+    assert list(concurrent) == list(sequential) == DEPTH_FIRST
+    assert {page_id: concurrent[page_id] for page_id in concurrent} == {page_id: sequential[page_id] for page_id in sequential}
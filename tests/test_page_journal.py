@@ -0,0 +1,27 @@
+import os
+
+from app.services.page_journal import PageJournal
+
+
+def crawl(tmp_path):
+    journal = PageJournal(str(tmp_path)).open()
+    journal.append({"id": "root", "title": "AI-assistant", "parent_id": None, "blocks": []})
+    journal.append({"id": "child", "title": "Notes", "parent_id": "root", "blocks": [{"id": "b1"}]})
+    journal.close(order=["root", "child"])
+    return journal
+
+
+def test_records_round_trip_through_the_index(tmp_path):
+    crawl(tmp_path)
+    journal = PageJournal.load(str(tmp_path))
+
+    assert list(journal) == ["root", "child"]
+    assert journal["child"]["blocks"] == [{"id": "b1"}]
+
+
+def test_meta_reads_only_the_index(tmp_path):
+    journal = crawl(tmp_path)
+    os.remove(journal.records_path)
+
+    assert journal.meta("child") == {"id": "child", "title": "Notes", "parent_id": "root"}
+    assert journal.meta("missing") is None
@@ -0,0 +1,13 @@
+import pytest
+
+from app.prompts.registry import PromptRegistry
+
+
+def test_all_templates_resolve():
+    builders = PromptRegistry.load([("summarization", "descriptor"), ("qa_video", "qa")])
+    assert all(callable(build) for build in builders.values())
+
+
+def test_missing_template_fails_at_load():
+    with pytest.raises(ValueError):
+        PromptRegistry.load([("summarization", "no_such_prompt")])
@@ -0,0 +1,29 @@
+import json
+
+from app.prompts.qa_video.qa_prompt import build_prompt
+from app.utils.markdown_parser import parse_between_delimiters
+from app.utils.standin_server import canned_response
+
+
+def video_context(with_times: bool) -> str:
+    context = (
+        "Top Relevant Transcripts:\n"
+        "[Transcript] [12.50 - 18.00] Gradient descent steps downhill (score: 0.3100)\n\n"
+        "Top Retrieved Frames:\n"
+        "/videos/lecture/screenshots/key_0001.png\n"
+        "/videos/lecture/screenshots/key_0004.png\n\n"
+    )
+    if with_times:
+        context += "Frame Times (same order as the frames above):\n00:00:12\n00:01:40\n\n"
+    return context + "Best Timestamp: 00:00:12"
+
+
+def test_video_answer_returns_exact_frame_paths():
+    for with_times in (False, True):
+        answer = canned_response(build_prompt(context=video_context(with_times), question="What is gradient descent?"))
+        frames = json.loads(parse_between_delimiters(output=answer, delimiter="<<RETRIEVED_IMAGES>>"))
+        assert frames == [
+            "/videos/lecture/screenshots/key_0001.png",
+            "/videos/lecture/screenshots/key_0004.png"
+        ]
+        assert "<<12.50 - 18.00>>" in parse_between_delimiters(output=answer, delimiter="<<BEST_TIMESTAMP>>")
@@ -0,0 +1,85 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from app.memory.chat_history import ChatHistory
+from app.utils.descriptor import Descriptor
+
+
+class FakeNotion:
+    def __init__(self, fail: bool):
+        self.fail = fail
+        self.pushed = []
+
+    def get_notion_page(self):
+        return "# Existing\nSome established summary."
+
+    def write_to_notion(self, markdown):
+        if self.fail:
+            raise RuntimeError("Notion is down")
+        self.pushed.append(markdown)
+
+
+class FakeSession:
+    def __init__(self, session_dir, fail_push: bool):
+        self.notion = FakeNotion(fail_push)
+        self.chat_history = ChatHistory()
+        self.chat_history_path = os.path.join(session_dir, "chat_history.json")
+        self.descriptor = Descriptor(os.path.join(session_dir, "descriptor"), "Existing: old summary")
+
+    def save(self):
+        self.chat_history.save(self.chat_history_path)
+
+
+def make_pipeline(monkeypatch):
+    summary_pipeline = pytest.importorskip("app.services.summary_pipeline")
+    monkeypatch.setattr(Descriptor, "generate", lambda self, final_summary="": "Existing: new summary")
+
+    pipeline = summary_pipeline.SummaryPipeline.__new__(summary_pipeline.SummaryPipeline)
+    pipeline.generation_chain = SimpleNamespace(
+        summarize=lambda raw_notes, prompt_type: "draft",
+        regenerate=lambda initial_summary, critique: "<<FINAL_SUMMARY>>final<<FINAL_SUMMARY>>"
+    )
+    pipeline.reflection_chain = SimpleNamespace(reflect=lambda **kwargs: "critique")
+    pipeline.chunker = SimpleNamespace(chunk_by_heading=lambda page: [])
+    return pipeline, summary_pipeline
+
+
+def run(pipeline, session):
+    return pipeline.run_with_descriptor(
+        raw_notes="notes", old_descriptor=session.descriptor, session_manager=session, push_to_notion=True
+    )
+
+
+def test_failed_push_saves_nothing(tmp_path, monkeypatch):
+    pipeline, summary_pipeline = make_pipeline(monkeypatch)
+    monkeypatch.setattr(summary_pipeline, "HeadingTreeBuilder", lambda headings: SimpleNamespace(build_tree=lambda: ""))
+    session = FakeSession(str(tmp_path), fail_push=True)
+
+    with pytest.raises(RuntimeError, match="Notion is down"):
+        run(pipeline, session)
+
+    assert not os.path.exists(session.chat_history_path)
+    assert not os.path.exists(os.path.join(session.descriptor.base_dir, "current.txt"))
+    # A retry starts from the old descriptor, not one already updated by the failed run
+    assert session.descriptor.content == "Existing: old summary"
+    assert session.chat_history.get_full() == []
+
+
+def test_successful_push_saves_history_and_descriptor(tmp_path, monkeypatch):
+    pipeline, summary_pipeline = make_pipeline(monkeypatch)
+    monkeypatch.setattr(summary_pipeline, "HeadingTreeBuilder", lambda headings: SimpleNamespace(build_tree=lambda: ""))
+    session = FakeSession(str(tmp_path), fail_push=False)
+
+    result = run(pipeline, session)
+
+    assert session.notion.pushed == ["final"]
+    assert result["new_descriptor"] == "Existing: new summary"
+    with open(os.path.join(session.descriptor.base_dir, "current.txt")) as f:
+        assert f.read() == "Existing: new summary"
+    with open(session.chat_history_path) as f:
+        history = json.load(f)
+    assert [entry["role"] for entry in history[:2]] == ["user", "generation_chain"]
+    assert history[-1]["content"] == "Existing: new summary"
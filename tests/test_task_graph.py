@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+
+from app.utils.task_graph import TaskGraph
+
+
+def test_results_are_passed_by_dependency_name():
+    graph = TaskGraph()
+    graph.add("page", lambda: "page text")
+    graph.add("draft", lambda: "draft")
+    graph.add("critique", lambda draft, page: f"{draft} vs {page}", deps=["page", "draft"])
+
+    assert graph.run() == {"page": "page text", "draft": "draft", "critique": "draft vs page text"}
+
+
+def test_independent_tasks_overlap():
+    # Each task waits for the other: the barrier only opens if both run at once
+    both = threading.Barrier(2, timeout=5)
+    graph = TaskGraph(max_workers=2)
+    graph.add("audio", lambda: both.wait() is not None)
+    graph.add("frames", lambda: both.wait() is not None)
+
+    assert graph.run() == {"audio": True, "frames": True}
+
+
+def test_first_failure_is_raised_and_dependents_do_not_run():
+    ran = []
+
+    def fail():
+        raise ValueError("fetch failed")
+
+    graph = TaskGraph()
+    graph.add("fetch", fail)
+    graph.add("summary", lambda fetch: ran.append("summary"), deps=["fetch"])
+    graph.add("push", lambda summary: ran.append("push"), deps=["summary"])
+
+    with pytest.raises(ValueError, match="fetch failed"):
+        graph.run()
+    assert ran == []
+
+
+def test_add_rejects_duplicates_and_unknown_dependencies():
+    graph = TaskGraph()
+    graph.add("page", lambda: None)
+
+    with pytest.raises(ValueError, match="already in the graph"):
+        graph.add("page", lambda: None)
+    with pytest.raises(ValueError, match="unknown task"):
+        graph.add("critique", lambda draft: None, deps=["draft"])
+
+
+def test_timings_are_recorded_for_every_task():
+    graph = TaskGraph()
+    graph.add("a", lambda: 1)
+    graph.add("b", lambda a: a + 1, deps=["a"])
+    graph.add("c", lambda: 3)
+    graph.run()
+
+    assert set(graph.timings) == {"a", "b", "c"}
+    assert all(seconds >= 0 for seconds in graph.timings.values())
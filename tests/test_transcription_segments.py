@@ -0,0 +1,83 @@
+import json
+import random
+import time
+
+import pytest
+
+from app.services.video_media import merge_transcriptions, plan_segments
+from app.utils.standin_server import canned_transcription
+
+
+def segment_result(index, offsets=(0.0, 4.0)):
+    """verbose_json for one segment, with words, whose text names the segment."""
+    return {
+        "language": "english",
+        "text": f" Segment {index}. ",
+        "segments": [
+            {"id": i, "start": start, "end": start + 4.0, "text": f" Segment {index}, part {i}."}
+            for i, start in enumerate(offsets)
+        ],
+        "words": [{"word": f"s{index}", "start": 1.0, "end": 1.5}]
+    }
+
+
+def test_segments_are_cut_in_silences_and_cover_the_audio():
+    silences = [(280.0, 281.0), (590.0, 592.0), (1150.0, 1151.0), (1190.0, 1192.0)]
+    segments = plan_segments(1500.0, silences, max_seconds=600)
+
+    assert segments == [(0.0, 591.0), (591.0, 1191.0), (1191.0, 1500.0)]
+
+
+def test_segments_without_silences_are_cut_at_the_limit():
+    assert plan_segments(1300.0, [], max_seconds=600) == [(0.0, 600.0), (600.0, 1200.0), (1200.0, 1300.0)]
+    assert plan_segments(90.0, [(10.0, 12.0)], max_seconds=600) == [(0.0, 90.0)]
+
+
+def test_merged_transcript_is_ordered_and_offset():
+    segments = [(0.0, 591.0), (591.0, 1191.0), (1191.0, 1500.0)]
+    merged = merge_transcriptions([segment_result(i) for i in range(3)], segments)
+
+    assert [seg["id"] for seg in merged["segments"]] == list(range(6))
+    assert [seg["start"] for seg in merged["segments"]] == [0.0, 4.0, 591.0, 595.0, 1191.0, 1195.0]
+    assert [seg["end"] for seg in merged["segments"]] == [4.0, 8.0, 595.0, 599.0, 1195.0, 1199.0]
+    assert [word["start"] for word in merged["words"]] == [1.0, 592.0, 1192.0]
+    assert merged["text"] == "Segment 0. Segment 1. Segment 2."
+    assert merged["duration"] == 1500.0
+    assert merged["language"] == "english"
+
+
+def test_merge_accepts_stand_in_transcriptions():
+    segments = [(0.0, 600.0), (600.0, 1000.0)]
+    merged = merge_transcriptions([canned_transcription(0), canned_transcription(1)], segments)
+
+    starts = [seg["start"] for seg in merged["segments"]]
+    assert starts == sorted(starts)
+    assert starts[3] == 600.0
+    assert "words" not in merged
+
+
+def test_concurrent_transcription_keeps_segment_order(tmp_path, monkeypatch):
+    videoQA = pytest.importorskip("app.services.videoQA")
+
+    segments = [(0.0, 600.0), (600.0, 1200.0), (1200.0, 1800.0), (1800.0, 2000.0)]
+    # Like split_audio, segments live in their own folder, removed after the merge
+    paths = [str(tmp_path / "audio_segments" / f"segment_{i:03d}.ogg") for i in range(len(segments))]
+    monkeypatch.setattr(videoQA, "detect_silences", lambda audio_path, **kwargs: (2000.0, []))
+    monkeypatch.setattr(videoQA, "split_audio", lambda audio_path, planned: paths)
+
+    qa = videoQA.VideoQA.__new__(videoQA.VideoQA)
+    qa.TRANSCRIPT_PATH = str(tmp_path / "transcript.txt")
+    qa.TRANSCRIBE_CONCURRENCY = 4
+
+    def transcribe_file(path):
+        # Later segments tend to finish first
+        time.sleep(random.uniform(0, 0.02))
+        return segment_result(paths.index(path))
+
+    qa.transcribe_file = transcribe_file
+    qa.transcribe_audio_groq(str(tmp_path / "audio.ogg"))
+
+    with open(tmp_path / "transcript.json", "r", encoding="utf-8") as f:
+        merged = json.load(f)
+    assert [seg["text"] for seg in merged["segments"][::2]] == [f" Segment {i}, part 0." for i in range(4)]
+    assert [seg["start"] for seg in merged["segments"][::2]] == [start for start, _ in segments]
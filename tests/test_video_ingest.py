@@ -0,0 +1,90 @@
+import os
+import threading
+
+import pytest
+
+from app.services import video_media
+
+
+def test_local_media_is_copied_once_and_then_reused(tmp_path, monkeypatch):
+    source = tmp_path / "lecture.mp4"
+    source.write_bytes(b"video bytes")
+    video_path = str(tmp_path / "video.mp4")
+    copies = []
+    copyfile = video_media.shutil.copyfile
+    monkeypatch.setattr(video_media.shutil, "copyfile", lambda src, dst: (copies.append(src), copyfile(src, dst)))
+
+    assert video_media.download_media(f"file://{source}", video_path) == video_path
+    assert video_media.download_media(str(source), video_path) == video_path
+
+    assert copies == [str(source)]
+    assert open(video_path, "rb").read() == b"video bytes"
+
+
+def test_local_path():
+    assert video_media.local_path("https://www.youtube.com/watch?v=abc") is None
+    assert video_media.local_path(__file__) == __file__
+    assert video_media.local_path(f"file://{__file__}") == __file__
+
+
+def test_ingest_downloads_once_and_runs_audio_and_frames_concurrently(tmp_path):
+    videoQA = pytest.importorskip("app.services.videoQA")
+
+    source = tmp_path / "lecture.mp4"
+    source.write_bytes(b"video bytes")
+    qa = videoQA.VideoQA.__new__(videoQA.VideoQA)
+    qa.VIDEO_PATH = str(tmp_path / "video.mp4")
+    qa.AUDIO_PATH = str(tmp_path / "audio.ogg")
+
+    downloads = []
+    # Both branches must be in flight at the same time to get past the barrier
+    both_branches = threading.Barrier(2, timeout=5)
+    download = qa.download_media
+
+    def download_media(url):
+        downloads.append(url)
+        return download(url)
+
+    def extract_audio():
+        both_branches.wait()
+        return qa.AUDIO_PATH
+
+    def capture_frames():
+        both_branches.wait()
+
+    qa.download_media = download_media
+    qa.extract_audio = extract_audio
+    qa.capture_frames = capture_frames
+    qa.transcribe_audio_groq = lambda audio_path: None
+    qa.load_text_index = lambda: ([], None)
+    qa.load_frame_index = lambda: ([], None)
+
+    timings = qa.ingest(str(source))
+
+    assert downloads == [str(source)]
+    assert set(timings) == {"download", "audio", "transcribe", "embed_text", "frames", "embed_frames", "total"}
+
+
+def test_interval_capture_removes_frames_of_an_earlier_keyframe_run(tmp_path, monkeypatch):
+    videoQA = pytest.importorskip("app.services.videoQA")
+
+    screenshots = tmp_path / "screenshots"
+    screenshots.mkdir()
+    for name in ("key_0000.png", "key_0001.png"):
+        (screenshots / name).write_bytes(b"old keyframe")
+
+    def fake_ffmpeg(cmd, check=True, **kwargs):
+        for i in (1, 2):
+            (screenshots / f"temp_{i:04d}.png").write_bytes(b"new frame")
+
+    monkeypatch.setattr(videoQA.subprocess, "run", fake_ffmpeg)
+    qa = videoQA.VideoQA.__new__(videoQA.VideoQA)
+    qa.VIDEO_PATH = str(tmp_path / "video.mp4")
+    qa.SCREENSHOT_DIR = qa.FRAMES_DIR = str(screenshots)
+    qa.INTERVAL = 5
+    qa.KEYFRAMES = False
+
+    qa.capture_frames()
+
+    assert [os.path.basename(path) for path in qa.list_frames()] == ["frame_0.png", "frame_5.png"]
+    assert qa.load_frame_times() == {"frame_0.png": 0.0, "frame_5.png": 5.0}
@@ -0,0 +1,86 @@
+import json
+
+import numpy as np
+
+from app.services.video_store import VideoEmbeddingStore, file_signature, normalize
+
+
+def batches_of(embeddings, size):
+    for start in range(0, len(embeddings), size):
+        yield start, embeddings[start:start + size]
+
+
+def test_text_round_trip_is_normalized(tmp_path):
+    store = VideoEmbeddingStore(str(tmp_path))
+    embeddings = np.array([[3.0, 4.0], [0.0, 2.0]], dtype=np.float32)
+    store.save_text([["transcript.txt", 10, 1]], ["chunk one", "chunk two"], embeddings)
+
+    chunks, loaded = store.load_text([["transcript.txt", 10, 1]])
+    assert chunks == ["chunk one", "chunk two"]
+    assert isinstance(loaded, np.memmap)
+    assert np.allclose(loaded, [[0.6, 0.8], [0.0, 1.0]])
+
+
+def test_frames_are_written_batch_by_batch(tmp_path):
+    store = VideoEmbeddingStore(str(tmp_path))
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(7, 4)).astype(np.float32)
+    names = [f"frame_{i:04d}.png" for i in range(7)]
+    store.save_frames([["frame_0000.png", 1, 1]], names, batches_of(embeddings, 3))
+
+    loaded_names, loaded = store.load_frames([["frame_0000.png", 1, 1]])
+    assert loaded_names == names
+    assert np.allclose(loaded, normalize(embeddings), atol=1e-6)
+    assert np.allclose(np.linalg.norm(loaded, axis=1), 1.0)
+
+
+def test_zero_frames(tmp_path):
+    store = VideoEmbeddingStore(str(tmp_path))
+    store.save_frames([], [], iter(()))
+
+    names, loaded = store.load_frames([])
+    assert names == []
+    assert loaded.shape == (0, 0)
+
+
+def test_signature_change_invalidates(tmp_path):
+    store = VideoEmbeddingStore(str(tmp_path))
+    store.save_text([["transcript.txt", 10, 1]], ["chunk"], np.ones((1, 2)))
+
+    assert store.load_text([["transcript.txt", 11, 2]]) is None
+
+
+def test_row_count_mismatch_invalidates(tmp_path):
+    store = VideoEmbeddingStore(str(tmp_path))
+    store.save_text([["transcript.txt", 10, 1]], ["chunk one", "chunk two"], np.ones((2, 2)))
+    meta_path = tmp_path / "embeddings" / "text.json"
+    meta = json.loads(meta_path.read_text())
+    meta["items"].append("chunk three")
+    meta_path.write_text(json.dumps(meta))
+
+    assert store.load_text([["transcript.txt", 10, 1]]) is None
+
+
+def test_corrupt_metadata_invalidates(tmp_path):
+    store = VideoEmbeddingStore(str(tmp_path))
+    store.save_text([["transcript.txt", 10, 1]], ["chunk"], np.ones((1, 2)))
+    (tmp_path / "embeddings" / "text.json").write_text("{not json")
+
+    assert store.load_text([["transcript.txt", 10, 1]]) is None
+
+
+def test_text_and_frames_are_invalidated_separately(tmp_path):
+    transcript = tmp_path / "transcript.txt"
+    frame = tmp_path / "frame_0000.png"
+    transcript.write_text("[0.00 - 1.00] hello")
+    frame.write_bytes(b"png")
+
+    store = VideoEmbeddingStore(str(tmp_path))
+    store.save_text(file_signature([transcript]), ["hello"], np.ones((1, 2)))
+    store.save_frames(file_signature([frame]), [frame.name], [(0, np.ones((1, 2)))])
+
+    transcript.write_text("[0.00 - 1.00] hello, edited")
+
+    assert store.load_text(file_signature([transcript])) is None
+    names, _ = store.load_frames(file_signature([frame]))
+    assert names == [frame.name]